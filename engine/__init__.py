@@ -0,0 +1,42 @@
+# headless recommendation engine used by app.py (and anything else that wants rankings)
+#
+# importing the package is cheap: submodules (and pandas/numpy with them) load on first
+# attribute access, and nothing here imports streamlit or altair.
+import importlib
+
+_EXPORTS = {
+    "Engine": "core",
+    "Profile": "core",
+    "Recommendation": "core",
+    "Selection": "core",
+    "recommend": "core",
+    "get_engine": "core",
+    "user_weights": "core",
+    "merge_and_normalize": "core",
+    "score_and_rank_schools": "core",
+    "TOP_N": "core",
+    "filter_by_state": "filters",
+    "filter_by_tuition": "filters",
+    "filter_by_debt": "filters",
+    "filter_by_minority_serving": "filters",
+    "filter_by_size": "filters",
+    "SnapshotStore": "snapshots",
+    "InstitutionTable": "institution_table",
+    "normalize_query": "query_cache",
+    "read_csv_cached": "data_cache",
+}
+
+__all__ = sorted(_EXPORTS)
+
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module 'engine' has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{module}", __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
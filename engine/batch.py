@@ -0,0 +1,221 @@
+# batch ranking: top-N colleges for every student profile in a CSV
+#
+#   python -m engine.batch cohort.csv -o ranked.csv --workers 8 --top-n 9
+#
+# input columns (only state is required, the rest default like the sidebar):
+#   profile_id, state, in_out_pref, tuition_min, tuition_max, debt_min, debt_max,
+#   student_body_size, msi_required, tuition_importance, debt_importance, msi_importance
+#
+# profiles are grouped by their filter query so each group runs filter/merge once, and the
+# distinct importance settings in a group are scored together with one matrix-matrix product.
+# groups are packed into tasks of about CHUNK_PROFILES profiles and spread over a process
+# pool; finished tasks are appended to the output (.csv, or .parquet when pyarrow is
+# installed) as they come back.
+import argparse
+import csv
+import multiprocessing
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from .core import (Engine, Profile, TOP_N, AFFORDABILITY_CSV, COLLEGE_CSV, column_directions,
+                   user_weights)
+from .institution_table import ID_COL
+from .scoring import rank_positions
+
+OUTPUT_COLUMNS = ["profile_id", "rank", "unit_id", "institution_name", "score"]
+CHUNK_PROFILES = 500
+
+_engine = None  # per process; set before forking so workers share the parent's copy
+
+
+def read_profiles(path, states=None):
+    """Profiles CSV -> (profile ids, Profiles). Raises ValueError naming the bad row."""
+    df = pd.read_csv(path, dtype={"profile_id": str, "state": str})
+    ids = df["profile_id"].tolist() if "profile_id" in df else [str(i) for i in range(len(df))]
+    profiles = []
+    for i, row in enumerate(df.to_dict("records")):
+        row = {k: v for k, v in row.items() if not (isinstance(v, float) and np.isnan(v))}
+        try:
+            for name, lo, hi in (("tuition_range", "tuition_min", "tuition_max"),
+                                 ("debt_range", "debt_min", "debt_max")):
+                if lo in row and hi in row:
+                    row[name] = (row.pop(lo), row.pop(hi))
+                elif lo in row or hi in row:
+                    raise ValueError(f"{lo} and {hi} must be given together")
+            profiles.append(Profile.from_dict(row, states))
+        except ValueError as e:
+            raise ValueError(f"{path} row {i + 2}: {e}")
+    return ids, profiles
+
+
+def plan(ids, profiles, chunk=CHUNK_PROFILES):
+    """Group profiles by filter query -> tasks, each a list of (query key, [(profile id, weights key)]).
+
+    big groups are split and small ones packed together, so every task holds about chunk
+    profiles (mostly-unique queries would otherwise cost one IPC round trip per profile).
+    """
+    groups = {}
+    for pid, p in zip(ids, profiles):
+        weights = (p.tuition_importance, p.debt_importance, p.msi_importance)
+        groups.setdefault(p.query_key(), []).append((pid, weights))
+    tasks, task, size = [], [], 0
+    for key, members in groups.items():
+        for start in range(0, len(members), chunk):
+            part = members[start:start + chunk]
+            if size and size + len(part) > chunk:
+                tasks.append(task)
+                task, size = [], 0
+            task.append((key, part))
+            size += len(part)
+    if task:
+        tasks.append(task)
+    return tasks
+
+
+def rank_group(engine, key, members, top_n=TOP_N):
+    """Output rows for one filter group; all distinct weightings scored in one product."""
+    selection = engine.select(key)
+    candidates = selection.candidates
+    if candidates is None:
+        return []
+    distinct = sorted({w for _, w in members})
+    column = {w: j for j, w in enumerate(distinct)}
+    weight_sets = [user_weights(*w) for w in distinct]
+    scores = candidates.score_many(weight_sets, column_directions(selection.merged.columns))
+    unit_ids = candidates.frame[ID_COL].to_numpy()
+    names = candidates.frame["Institution Name"].to_numpy()
+    ranked = {}
+    for w, j in column.items():
+        order = rank_positions(scores[:, j], candidates.groups, top_n)
+        ranked[w] = (order, scores[order, j])
+    rows = []
+    for pid, w in members:
+        order, top = ranked[w]
+        rows.extend((pid, r + 1, int(unit_ids[o]), names[o], float(s))
+                    for r, (o, s) in enumerate(zip(order, top)))
+    return rows
+
+
+def _init_worker(paths):
+    global _engine
+    if _engine is None:
+        # spawn start method: nothing inherited, load from the (warm) snapshot cache
+        _engine = Engine.load(*paths)
+
+
+def _run_task(task):
+    groups, top_n = task
+    rows = []
+    for key, members in groups:
+        rows.extend(rank_group(_engine, key, members, top_n))
+    return sum(len(members) for _, members in groups), rows
+
+
+class _CsvSink:
+    def __init__(self, path):
+        self._file = open(path, "w", newline="")
+        self._writer = csv.writer(self._file)
+        self._writer.writerow(OUTPUT_COLUMNS)
+
+    def write(self, rows):
+        self._writer.writerows(rows)
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+class _ParquetSink:
+    def __init__(self, path):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        self._pa = pa
+        self._schema = pa.schema([("profile_id", pa.string()), ("rank", pa.int32()),
+                                  ("unit_id", pa.int64()), ("institution_name", pa.string()),
+                                  ("score", pa.float64())])
+        self._writer = pq.ParquetWriter(path, self._schema)
+
+    def write(self, rows):
+        if rows:
+            columns = list(zip(*rows))
+            self._writer.write_table(self._pa.table(
+                [self._pa.array(c, type=f.type) for c, f in zip(columns, self._schema)], schema=self._schema))
+
+    def close(self):
+        self._writer.close()
+
+
+def open_sink(path):
+    if path.endswith(".parquet"):
+        try:
+            return _ParquetSink(path)
+        except ImportError:
+            raise SystemExit("writing .parquet needs pyarrow (pip install pyarrow), or use a .csv output")
+    return _CsvSink(path)
+
+
+def run_batch(profiles_path, output_path, workers=None, top_n=TOP_N,
+              paths=(AFFORDABILITY_CSV, COLLEGE_CSV), progress=sys.stderr):
+    """Rank every profile in profiles_path into output_path; returns (profiles, seconds)."""
+    global _engine
+    start = time.perf_counter()
+    if _engine is None:
+        _engine = Engine.load(*paths)
+    ids, profiles = read_profiles(profiles_path, _engine.institutions.states)
+    tasks = [(groups, top_n) for groups in plan(ids, profiles)]
+    workers = workers or os.cpu_count() or 1
+    sink = open_sink(output_path)
+    done = 0
+    shown = start
+    pool = None
+    finished = False
+    try:
+        if workers == 1:
+            results = map(_run_task, tasks)
+        else:
+            pool = multiprocessing.Pool(workers, initializer=_init_worker, initargs=(paths,))
+            # a few batches of tasks per worker: fewer round trips, still balanced
+            results = pool.imap_unordered(_run_task, tasks, chunksize=max(1, len(tasks) // (workers * 4)))
+        for n, rows in results:
+            sink.write(rows)
+            done += n
+            now = time.perf_counter()
+            if progress is not None and (now - shown > 0.5 or done == len(profiles)):
+                shown = now
+                print(f"\r{done}/{len(profiles)} profiles, {done / (now - start):,.0f} profiles/s",
+                      end="", file=progress, flush=True)
+        finished = True
+    finally:
+        if pool is not None:
+            if finished:
+                pool.close()
+            else:
+                # a worker or the sink failed: don't leave the rest of the tasks running
+                pool.terminate()
+            pool.join()
+        sink.close()
+    elapsed = time.perf_counter() - start
+    if progress is not None:
+        print(file=progress)
+    return len(profiles), elapsed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="rank colleges for every student profile in a CSV")
+    parser.add_argument("profiles", help="CSV of student profiles")
+    parser.add_argument("-o", "--output", default="ranked.csv", help=".csv or .parquet")
+    parser.add_argument("--workers", type=int, default=None, help="processes (default: all cores)")
+    parser.add_argument("--top-n", type=int, default=TOP_N)
+    parser.add_argument("--affordability", default=AFFORDABILITY_CSV)
+    parser.add_argument("--college", default=COLLEGE_CSV)
+    args = parser.parse_args()
+    try:
+        n, elapsed = run_batch(args.profiles, args.output, args.workers, args.top_n,
+                               (args.affordability, args.college))
+    except ValueError as e:
+        raise SystemExit(str(e))
+    print(f"{n} profiles in {elapsed:.2f}s ({n / elapsed:,.0f} profiles/s) -> {args.output}")
@@ -0,0 +1,260 @@
+# per-stage benchmarks for a GO click, at the bundled size and scaled-up copies
+#
+#   python -m engine.bench                                  # 1x, 10x, 100x -> bench_results.json
+#   python -m engine.bench --scales 1,10,100,1000 --repeat 50
+#   python -m engine.bench --save-baseline bench_baseline.json
+#   python -m engine.bench --baseline bench_baseline.json   # exit 1 on regressions
+#
+# stages, each timed on its own with everything it needs already built:
+#   load_data            both CSVs through read_csv_cached (warm snapshot) + building the engine
+#   filter_state .. filter_size   one filter each: predicate + its row bitmap
+#   intersection         combine() over the five prebuilt bitmaps
+#   merge_and_normalize  indexed row take + normalization of the matching rows
+#   score_and_rank       score_and_rank_schools, top-N
+#   detail_precompute    DetailPayloads over the whole table (done once per snapshot)
+#   detail_lookup        building one institution's detail panel payload by Unit ID; the
+#                        payload LRU is cleared first, so this is the first-view cost, not a hit
+# every timed run is repeated (median / p95 / p99 / max reported); peak memory is measured
+# in a separate pass under tracemalloc so its overhead doesn't leak into the timings, and
+# the process peak RSS is recorded after each scale.
+#
+# scaled datasets are the bundled CSVs tiled N times with fresh Unit IDs, suffixed names and
+# a little jitter on the numbers, or with --synthetic N x as many rows drawn from engine.synth;
+# either way written once under --data-dir and reused.
+# without affordability_raw.csv (e.g. a checkout that only has the college file) the CLI
+# falls back to --synthetic, which learns from the college file alone.
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from . import synth
+from .core import (Engine, Profile, TOP_N, AFFORDABILITY_CSV, COLLEGE_CSV, merge_and_normalize,
+                   score_and_rank_schools, column_directions)
+from .data_cache import read_csv_cached
+from .details import DetailPayloads
+from .filter_engine import Predicate, combine
+from .filters import (filter_by_state, filter_by_tuition, filter_by_debt, filter_by_minority_serving,
+                      filter_by_size)
+from .ingest import peak_rss_mb
+from .institution_table import ID_COL, AFF_ID_COL
+from .metrics import NAME_COL
+
+SCALES = (1, 10, 100)
+DATA_DIR = "bench_data"
+TOLERANCE = 0.25   # a stage regresses when its median is this much slower than the baseline...
+MIN_DELTA_MS = 0.1  # ...and at least this many ms slower (sub-0.1 ms noise never fails)
+
+FILTERS = {
+    "filter_state": lambda t, p: filter_by_state(t, p.state, p.in_out_pref),
+    "filter_tuition": lambda t, p: filter_by_tuition(t, p.tuition_range, p.in_out_pref, p.state),
+    "filter_debt": lambda t, p: filter_by_debt(t, p.debt_range),
+    "filter_msi": lambda t, p: filter_by_minority_serving(t, p.msi_required),
+    "filter_size": lambda t, p: filter_by_size(t, p.student_body_size),
+}
+
+
+def scaled_frames(affordability_df, college_df, factor, seed=0):
+    """Both tables tiled factor times; copy k gets Unit ID + k * 10^7 and a " (k)" name suffix."""
+    rng = np.random.default_rng(seed)
+    out = []
+    for df, id_col in ((affordability_df, AFF_ID_COL), (college_df, ID_COL)):
+        copies = np.repeat(np.arange(factor), len(df))
+        big = df.iloc[np.tile(np.arange(len(df)), factor)].reset_index(drop=True)
+        big[id_col] = big[id_col].to_numpy() + copies * 10_000_000
+        if NAME_COL in big.columns:
+            suffix = np.where(copies == 0, "", " (" + copies.astype(str) + ")")
+            big[NAME_COL] = big[NAME_COL].astype(str).to_numpy() + suffix
+        for col in big.columns:
+            if big[col].dtype.kind == "f":
+                jitter = np.where(copies == 0, 1.0, rng.uniform(0.95, 1.05, len(big)))
+                big[col] = big[col].to_numpy() * jitter.astype(big[col].dtype)
+        out.append(big)
+    return out
+
+
+def dataset_paths(scale, data_dir=DATA_DIR, paths=(AFFORDABILITY_CSV, COLLEGE_CSV), synthetic=False):
+    """CSV paths for a scale, writing the scaled copies first if they don't exist yet."""
+    if scale == 1 and not synthetic:
+        return paths
+    target = os.path.join(data_dir, f"{scale}x-synthetic" if synthetic else f"{scale}x")
+    out = tuple(os.path.join(target, os.path.basename(p)) for p in paths)
+    if all(os.path.exists(p) for p in out):
+        return out
+    if synthetic:
+        rows = len(pd.read_csv(paths[1], usecols=[0]))
+        synth.generate(synth.learn_files(paths[1], paths[0]), rows * scale, target)
+    else:
+        os.makedirs(target, exist_ok=True)
+        frames = scaled_frames(pd.read_csv(paths[0]), pd.read_csv(paths[1]), scale)
+        for df, p in zip(frames, out):
+            df.to_csv(p + ".tmp", index=False)
+            os.replace(p + ".tmp", p)
+    return out
+
+
+def profiles_for(engine, n=5):
+    """A fixed spread of sidebar profiles over the biggest states."""
+    sizes = sorted(engine.institutions.state_slices.items(), key=lambda kv: kv[1].start - kv[1].stop)
+    states = [s for s, _ in sizes[:n]] or ["CA"]
+    prefs = ["In-State", "Out-of-State", "I don't care"]
+    return [Profile(state=s, in_out_pref=prefs[i % 3], student_body_size=["Small", "Medium", "Large"][i % 3],
+                    msi_required=i % 2 == 1) for i, s in enumerate(states)]
+
+
+def stage_calls(engine, paths, profiles):
+    """stage name -> list of zero-argument callables (one per profile / lookup)."""
+    table = engine.institutions
+    n = len(table)
+    calls = {"load_data": [lambda: Engine(read_csv_cached(paths[0]), read_csv_cached(paths[1]))]}
+    for name, make in FILTERS.items():
+        calls[name] = [lambda p=p, make=make: (lambda pr: pr and pr.build())(make(table, p)) for p in profiles]
+    prebuilt, found, merged = [], [], []
+    for p in profiles:
+        masks = []
+        for make in FILTERS.values():
+            pred = make(table, p)
+            if pred is not None:
+                masks.append(Predicate(pred.name, pred.estimate, lambda m=pred.build(): m))
+        prebuilt.append(masks)
+        ids = table.ids[combine(n, masks)]
+        found.append(ids)
+        merged.append(merge_and_normalize(table, ids))
+    calls["intersection"] = [lambda m=m: combine(n, m) for m in prebuilt]
+    calls["merge_and_normalize"] = [lambda ids=ids: merge_and_normalize(table, ids) for ids in found]
+    calls["score_and_rank"] = [
+        lambda df=df, p=p: score_and_rank_schools(df, p.weights(), column_directions(df.columns), TOP_N)
+        for df, p in zip(merged, profiles)]
+    rng = np.random.default_rng(0)
+    calls["detail_precompute"] = [lambda: DetailPayloads(table)]
+
+    def detail_cold(uid):
+        engine.details.cache.clear()
+        return engine.detail(uid)
+    calls["detail_lookup"] = [lambda uid=uid: detail_cold(uid) for uid in rng.choice(table.ids, 20)]
+    return calls
+
+
+def time_stage(fns, repeat):
+    times = []
+    for _ in range(repeat):
+        for fn in fns:
+            start = time.perf_counter()
+            fn()
+            times.append((time.perf_counter() - start) * 1000)
+    t = np.array(times)
+    return {"runs": len(t), "median_ms": round(float(np.median(t)), 4),
+            "p95_ms": round(float(np.percentile(t, 95)), 4), "p99_ms": round(float(np.percentile(t, 99)), 4),
+            "max_ms": round(float(t.max()), 4)}
+
+
+def peak_memory_mb(fns):
+    tracemalloc.start()
+    try:
+        for fn in fns:
+            fn()
+        return round(tracemalloc.get_traced_memory()[1] / 2**20, 3)
+    finally:
+        tracemalloc.stop()
+
+
+def run_scale(scale, repeat, data_dir=DATA_DIR, paths=(AFFORDABILITY_CSV, COLLEGE_CSV), synthetic=False):
+    paths = dataset_paths(scale, data_dir, paths, synthetic)
+    engine = Engine.load(*paths)  # also warms the snapshot cache for load_data
+    calls = stage_calls(engine, paths, profiles_for(engine))
+    stages = {}
+    for name, fns in calls.items():
+        # loading is slow and allocation heavy at scale, a few runs are enough
+        stats = time_stage(fns, max(1, repeat // 10) if name == "load_data" else repeat)
+        stats["peak_mb"] = peak_memory_mb(fns)
+        stages[name] = stats
+    return {"rows": len(engine.institutions), "stages": stages, "peak_rss_mb": peak_rss_mb()}
+
+
+def run(scales=SCALES, repeat=20, data_dir=DATA_DIR, paths=(AFFORDABILITY_CSV, COLLEGE_CSV), progress=sys.stderr,
+        synthetic=False):
+    results = {}
+    for scale in scales:
+        if progress is not None:
+            print(f"{scale}x ...", file=progress, flush=True)
+        results[f"{scale}x"] = run_scale(scale, repeat, data_dir, paths, synthetic)
+    return {"meta": {"python": platform.python_version(), "numpy": np.__version__, "pandas": pd.__version__,
+                     "platform": platform.platform(), "repeat": repeat, "synthetic": synthetic,
+                     "date": time.strftime("%Y-%m-%dT%H:%M:%S")},
+            "results": results}
+
+
+def compare(current, baseline, tolerance=TOLERANCE, min_delta_ms=MIN_DELTA_MS):
+    """[(scale, stage, baseline ms, current ms, ratio, regressed)] for stages present in both."""
+    rows = []
+    for scale, res in current["results"].items():
+        base = baseline.get("results", {}).get(scale)
+        if base is None:
+            continue
+        for stage, stats in res["stages"].items():
+            b = base["stages"].get(stage)
+            if b is None:
+                continue
+            old, new = b["median_ms"], stats["median_ms"]
+            ratio = new / old if old else float("inf")
+            rows.append((scale, stage, old, new, ratio, ratio > 1 + tolerance and new - old > min_delta_ms))
+    return rows
+
+
+def format_results(result):
+    lines = []
+    for scale, res in result["results"].items():
+        rss = f", peak RSS {res['peak_rss_mb']:.0f} MB" if res.get("peak_rss_mb") else ""
+        lines.append(f"{scale} ({res['rows']:,} institutions{rss})")
+        for stage, s in res["stages"].items():
+            lines.append(f"  {stage:<20} median {s['median_ms']:9.3f} ms  p95 {s['p95_ms']:9.3f}  "
+                         f"p99 {s['p99_ms']:9.3f}  max {s['max_ms']:9.3f}  peak {s['peak_mb']:8.2f} MB")
+    return "\n".join(lines)
+
+
+def format_comparison(rows):
+    lines = []
+    for scale, stage, old, new, ratio, regressed in rows:
+        flag = "  REGRESSION" if regressed else ""
+        lines.append(f"{scale:>6} {stage:<20} {old:9.3f} -> {new:9.3f} ms ({ratio:5.2f}x){flag}")
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="time each recommendation pipeline stage")
+    parser.add_argument("--scales", default=",".join(map(str, SCALES)),
+                        help="comma separated row multipliers (1000 needs several GB of RAM)")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--data-dir", default=DATA_DIR, help="where scaled CSV copies are kept")
+    parser.add_argument("--synthetic", action="store_true",
+                        help="scale with engine.synth data instead of tiled copies of the bundled CSVs")
+    parser.add_argument("--output", default="bench_results.json")
+    parser.add_argument("--baseline", help="compare against this results file, exit 1 on regressions")
+    parser.add_argument("--save-baseline", help="also write the results here as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE)
+    args = parser.parse_args()
+    synthetic = args.synthetic
+    if not os.path.exists(COLLEGE_CSV):
+        raise SystemExit(f"{COLLEGE_CSV} not found: run from the directory with the app's CSVs")
+    if not synthetic and not os.path.exists(AFFORDABILITY_CSV):
+        # engine.synth can learn from the college file alone
+        print(f"{AFFORDABILITY_CSV} not found, benchmarking synthetic data instead", file=sys.stderr)
+        synthetic = True
+    result = run([int(s) for s in args.scales.split(",")], args.repeat, args.data_dir, synthetic=synthetic)
+    print(format_results(result))
+    for path in filter(None, (args.output, args.save_baseline)):
+        with open(path, "w") as f:
+            json.dump(result, f, indent=2)
+    if args.baseline:
+        with open(args.baseline) as f:
+            rows = compare(result, json.load(f), args.tolerance)
+        print(format_comparison(rows))
+        regressions = [r for r in rows if r[-1]]
+        if regressions:
+            raise SystemExit(f"{len(regressions)} stage(s) regressed more than {args.tolerance:.0%}")
@@ -0,0 +1,137 @@
+# vega-lite specs for the results page, built once per ranking
+#
+# the top-9 grid used to draw a separate altair bar chart per card: a new frame and a new
+# spec each, nine specs serialized on every rerun. the tuition comparison is now one chart
+# over a single long-format frame (one row per institution x tuition type):
+#   tuition_grid     faceted, one small panel per institution in rank order, three per row
+#   tuition_layered  one chart, a grouped bar per institution (in-state / out-of-state)
+# specs are plain dicts, so st.vega_lite_chart takes them as they are and altair isn't
+# needed to build them. Engine.chart_spec() caches them by (Unit IDs in rank order, chart
+# type); reruns that keep the ranking (e.g. a View details click) reuse the cached spec.
+# the detail panel's charts (tuition breakdown, debt-to-earnings gauge, demographics donut)
+# are built here too, once per institution, as part of its engine.details payload.
+import numpy as np
+import pandas as pd
+
+from .institution_table import IN_STATE_TUITION, OUT_STATE_TUITION
+from .metrics import NAME_COL
+
+VEGA_LITE = "https://vega.github.io/schema/vega-lite/v5.json"
+TUITION_TYPES = {"In-State": IN_STATE_TUITION, "Out-of-State": OUT_STATE_TUITION}
+
+
+def tuition_frame(table, ids):
+    """Long format: one row per (institution, tuition type) with a value, in rank order."""
+    wide = table.take(ids, [NAME_COL] + list(TUITION_TYPES.values()))
+    if wide.empty:
+        return pd.DataFrame(columns=["Unit ID", "Rank", "Institution", "Type", "Cost"])
+    # "rank. name" keeps facets apart when two institutions share a name
+    labels = [f"{r}. {n}" for r, n in zip(range(1, len(wide) + 1), wide[NAME_COL])]
+    long = pd.DataFrame({
+        "Unit ID": np.tile(wide.index.to_numpy(), len(TUITION_TYPES)),
+        "Rank": np.tile(np.arange(1, len(wide) + 1), len(TUITION_TYPES)),
+        "Institution": np.tile(labels, len(TUITION_TYPES)),
+        "Type": np.repeat(list(TUITION_TYPES), len(wide)),
+        "Cost": np.concatenate([wide[c].to_numpy(dtype=float) for c in TUITION_TYPES.values()]),
+    })
+    return long[long["Cost"].notna()].sort_values(["Rank", "Type"], kind="stable").reset_index(drop=True)
+
+
+def _values(df):
+    return [{"Unit ID": int(u), "Rank": int(r), "Institution": i, "Type": t, "Cost": float(c)}
+            for u, r, i, t, c in zip(df["Unit ID"], df["Rank"], df["Institution"], df["Type"], df["Cost"])]
+
+
+def _order(df):
+    return list(dict.fromkeys(df["Institution"]))
+
+
+_TOOLTIP = [{"field": "Institution", "type": "nominal"}, {"field": "Type", "type": "nominal"},
+            {"field": "Cost", "type": "quantitative", "format": "$,.0f"}]
+
+
+def tuition_grid(df):
+    return {
+        "$schema": VEGA_LITE,
+        "data": {"values": _values(df)},
+        "columns": 3,
+        "facet": {"field": "Institution", "type": "nominal", "sort": _order(df),
+                  "header": {"title": None, "labelLimit": 240}},
+        "spec": {
+            "height": 60,
+            "mark": {"type": "bar", "size": 12},
+            "encoding": {
+                "x": {"field": "Cost", "type": "quantitative", "title": "Cost ($)"},
+                "y": {"field": "Type", "type": "nominal", "title": None},
+                "color": {"field": "Type", "type": "nominal", "legend": None},
+                "tooltip": _TOOLTIP,
+            },
+        },
+    }
+
+
+def tuition_layered(df):
+    return {
+        "$schema": VEGA_LITE,
+        "data": {"values": _values(df)},
+        "mark": {"type": "bar"},
+        "encoding": {
+            "y": {"field": "Institution", "type": "nominal", "sort": _order(df), "title": None},
+            "yOffset": {"field": "Type", "type": "nominal"},
+            "x": {"field": "Cost", "type": "quantitative", "title": "Annual Cost ($)"},
+            "color": {"field": "Type", "type": "nominal", "title": None},
+            "tooltip": _TOOLTIP,
+        },
+    }
+
+
+def tuition_breakdown(values):
+    """[{"Category", "Cost"}] -> bar per tuition type."""
+    return {
+        "$schema": VEGA_LITE,
+        "data": {"values": values},
+        "mark": {"type": "bar"},
+        "encoding": {
+            "x": {"field": "Cost", "type": "quantitative", "title": "Annual Cost ($)"},
+            "y": {"field": "Category", "type": "nominal", "sort": "-x", "title": None},
+        },
+    }
+
+
+def debt_gauge(ratio):
+    return {
+        "$schema": VEGA_LITE,
+        "data": {"values": [{"metric": "Ratio", "value": ratio}]},
+        "height": 50,
+        "mark": {"type": "bar"},
+        "encoding": {
+            "x": {"field": "value", "type": "quantitative", "title": "Debt-to-earnings",
+                  "scale": {"domain": [0, max(5, ratio + 1)]}},
+            "y": {"field": "metric", "type": "nominal", "title": None},
+        },
+    }
+
+
+def demographics_donut(values):
+    """[{"race", "pct"}] -> donut chart."""
+    return {
+        "$schema": VEGA_LITE,
+        "data": {"values": values},
+        "mark": {"type": "arc", "innerRadius": 50},
+        "encoding": {
+            "theta": {"field": "pct", "type": "quantitative"},
+            "color": {"field": "race", "type": "nominal"},
+            "tooltip": [{"field": "race", "type": "nominal"}, {"field": "pct", "type": "quantitative"}],
+        },
+    }
+
+
+CHARTS = {"tuition_grid": tuition_grid, "tuition_layered": tuition_layered}
+
+
+def chart_spec(table, ids, kind="tuition_grid"):
+    """Vega-Lite spec of chart kind over ids (rank order); None when none of them has a value."""
+    if kind not in CHARTS:
+        raise ValueError(f"unknown chart type {kind!r}, expected one of {sorted(CHARTS)}")
+    df = tuition_frame(table, ids)
+    return CHARTS[kind](df) if not df.empty else None
@@ -0,0 +1,95 @@
+# compact in-memory schema for the two datasets + a per-table memory report
+#
+# pandas defaults keep every rate and dollar amount as float64, the 0/1 MSI flags as
+# int/float and state/sector/name as one Python string per row. compact_frame() applies:
+#   float32        rates, percentages and dollar amounts (exact for whole dollars < 16M)
+#   bool           MSI Status and the per-type MSI flags (1 -> True, anything else False)
+#   category       State Abbreviation, Sector Name
+#   interned str   Institution Name, so repeated names (duplicate rows, yearly files) share one object
+#   int64          Unit IDs stay as they are, other integer columns get the smallest int type
+# it is idempotent. on already compact frames (e.g. warm snapshot loads) the numeric, flag
+# and category columns pass through without copies; Institution Name is re-interned (a new
+# object column, one dict lookup per row), since there's no cheap way to tell it already is.
+#
+#   python -m engine.compact   -> default vs compact memory for the bundled CSVs
+import sys
+
+import numpy as np
+import pandas as pd
+
+from .institution_table import ID_COL, AFF_ID_COL, STATE_COL
+from .metrics import MSI_Type, NAME_COL
+
+ID_COLS = {ID_COL, AFF_ID_COL}
+FLAG_COLS = set(MSI_Type.values()) | {"MSI Status"}
+CATEGORY_COLS = {STATE_COL, "Sector Name"}
+INTERNED_COLS = {NAME_COL}
+
+
+def _intern(value):
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+def compact_frame(df):
+    """df with the compact dtypes applied (columns are replaced, df itself isn't modified)."""
+    out = {}
+    for col in df.columns:
+        s = df[col]
+        if col in ID_COLS:
+            pass
+        elif col in FLAG_COLS:
+            if s.dtype != bool:
+                s = s == 1
+        elif col in CATEGORY_COLS:
+            if not isinstance(s.dtype, pd.CategoricalDtype):
+                s = s.astype("category")
+        elif col in INTERNED_COLS:
+            s = s.map(_intern)
+        elif s.dtype.kind == "f" and s.dtype != np.float32:
+            s = s.astype(np.float32)
+        elif s.dtype.kind in "iu" and s.dtype.itemsize > 1:
+            s = pd.to_numeric(s, downcast="integer")
+        out[col] = s
+    return pd.DataFrame(out, index=df.index, copy=False)
+
+
+def frame_bytes(df):
+    return int(df.memory_usage(deep=True, index=True).sum())
+
+
+def memory_report(tables):
+    """{table name: frame, ndarray or list of ndarrays} -> one row per table: rows, columns, MB, dtypes."""
+    rows = []
+    for name, obj in tables.items():
+        if isinstance(obj, pd.DataFrame):
+            dtypes = obj.dtypes.astype(str).value_counts()
+            rows.append({"table": name, "rows": len(obj), "columns": obj.shape[1],
+                         "mb": round(frame_bytes(obj) / 2**20, 3),
+                         "dtypes": ", ".join(f"{n} {t}" for t, n in dtypes.items())})
+        elif isinstance(obj, list):
+            # several arrays reported as one table (e.g. the range index arrays)
+            rows.append({"table": name, "rows": max((len(a) for a in obj), default=0), "columns": len(obj),
+                         "mb": round(sum(a.nbytes for a in obj) / 2**20, 3),
+                         "dtypes": ", ".join(sorted({str(a.dtype) for a in obj}))})
+        else:
+            arr = np.asarray(obj)
+            rows.append({"table": name, "rows": arr.shape[0] if arr.ndim else 1,
+                         "columns": arr.shape[1] if arr.ndim > 1 else 1,
+                         "mb": round(arr.nbytes / 2**20, 3), "dtypes": str(arr.dtype)})
+    return rows
+
+
+def format_memory_report(rows):
+    total = sum(r["mb"] for r in rows)
+    lines = [f"{r['table']}: {r['rows']:,} x {r['columns']}, {r['mb']:.2f} MB ({r['dtypes']})" for r in rows]
+    lines.append(f"total: {total:.2f} MB")
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    from .core import AFFORDABILITY_CSV, COLLEGE_CSV
+    paths = sys.argv[1:] or [AFFORDABILITY_CSV, COLLEGE_CSV]
+    for p in paths:
+        raw = pd.read_csv(p)
+        small = compact_frame(raw)
+        print(f"{p}: {frame_bytes(raw) / 2**20:.2f} MB default -> {frame_bytes(small) / 2**20:.2f} MB compact")
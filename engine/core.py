@@ -0,0 +1,337 @@
+# the recommendation pipeline without any UI: load -> filter -> merge/normalize -> score/rank
+#
+#   from engine import Engine, Profile
+#   engine = Engine.load()
+#   result = engine.recommend(Profile(state="CA", in_out_pref="In-State"))
+#   result.ranked  # top rows, best first, with a score column
+import math
+import threading
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+
+from .charts import chart_spec
+from .compact import compact_frame, memory_report
+from .data_cache import read_csv_cached
+from .details import DetailPayloads
+from .filter_engine import combine
+from .filters import (filter_by_state, filter_by_tuition, filter_by_debt,
+                      filter_by_minority_serving, filter_by_size)
+from .institution_table import InstitutionTable, ID_COL
+from .metrics import MetricTable
+from .name_index import NameIndex
+from .query_cache import QueryCache, normalize_query
+from .scoring import ScoringCandidates, fit_minmax, apply_minmax
+from .tracing import tracer
+
+AFFORDABILITY_CSV = "affordability_raw.csv"
+COLLEGE_CSV = "college_selected_raw.csv"
+
+# how many recommendation cards the results grid shows
+TOP_N = 9
+
+# "global": min/max fit once over every institution at load, so a school's normalized values
+# don't depend on which other schools passed the filters. "subset": refit on the filtered rows.
+NORMALIZATION = "global"
+
+# sidebar choices
+IN_OUT_PREFS = ("In-State", "Out-of-State", "I don't care")
+SIZES = ("Small", "Medium", "Large")
+IMPORTANCE_RANGE = (0, 5)  # the sidebar's importance sliders
+
+# dynamic column directions: default to higher unless known lower
+LOWER_IS_BETTER = {
+    "Median Debt for Dependent Students",
+    "Median Debt for Independent Students",
+    "Average In-State Tuition for First-Time, Full-Time Undergraduates",
+    "Out-of-State Average Tuition for First-Time, Full-Time Undergraduates",
+    "Affordability Gap (net price minus income earned working 10 hrs at min wage)"
+}
+
+
+def user_weights(tuition_importance=3, debt_importance=3, msi_importance=1):
+    """Importance sliders (0-5) -> per-column scoring weights."""
+    return {
+        "Median Debt for Dependent Students": debt_importance,
+        "Median Debt for Independent Students": debt_importance,
+        "Average In-State Tuition for First-Time, Full-Time Undergraduates": tuition_importance,
+        "Out-of-State Average Tuition for First-Time, Full-Time Undergraduates": tuition_importance,
+        "Average Amount of Loans Awarded to First-Time, Full-Time Undergraduates": tuition_importance,
+        "Average Amount of Federal Grant Aid Awarded to First-Time, Full-Time Undergraduates": tuition_importance,
+        "Average Amount of Institutional Grant Aid Awarded to First-Time, Full-Time Undergraduates": tuition_importance,
+        "Average Work Study Award": tuition_importance,
+        "Affordability Gap (net price minus income earned working 10 hrs at min wage)": tuition_importance,
+        "MSI Status": msi_importance,
+        "Median Earnings of Students Working and Not Enrolled 10 Years After Entry": 3
+    }
+
+
+def _range(value, name):
+    if isinstance(value, str):
+        value = value.split(",")
+    try:
+        lower, upper = (float(v) for v in value)
+    except (TypeError, ValueError):
+        raise ValueError(f"{name} must be two numbers (thousands of $)")
+    if not (math.isfinite(lower) and math.isfinite(upper)):
+        raise ValueError(f"{name} bounds must be finite numbers")
+    if lower > upper:
+        raise ValueError(f"{name} lower bound is above its upper bound")
+    return (lower, upper)
+
+
+def _flag(value):
+    if isinstance(value, str):
+        return value.lower() in ("1", "true", "yes", "on")
+    return bool(value)
+
+
+def column_directions(columns):
+    return {c: "lower" if c in LOWER_IS_BETTER else "higher" for c in columns}
+
+
+@dataclass(frozen=True)
+class Profile:
+    """One student's sidebar inputs; defaults match the Streamlit sidebar defaults."""
+    state: str
+    in_out_pref: str = "I don't care"
+    tuition_range: tuple = (20, 75)  # thousands of $
+    debt_range: tuple = (10, 40)     # thousands of $
+    student_body_size: str = "Medium"
+    msi_required: bool = False
+    tuition_importance: int = 3
+    debt_importance: int = 3
+    msi_importance: int = 1
+
+    @classmethod
+    def from_dict(cls, payload, states=None):
+        """Profile from loosely typed input (JSON, query string, CSV row). Raises ValueError.
+
+        states, when given (e.g. engine.institutions.states), is the set of accepted states.
+        """
+        if not isinstance(payload, dict):
+            raise ValueError("profile must be a mapping")
+        state = payload.get("state")
+        if not state:
+            raise ValueError("state is required")
+        if not isinstance(state, str):
+            raise ValueError("state must be a two-letter state abbreviation")
+        if states is not None and state not in states:
+            # an unknown state would silently make every school out-of-state
+            raise ValueError(f"unknown state {state!r}")
+        defaults = cls(state=state)
+        in_out_pref = payload.get("in_out_pref", defaults.in_out_pref)
+        if in_out_pref not in IN_OUT_PREFS:
+            raise ValueError(f"in_out_pref must be one of {', '.join(IN_OUT_PREFS)}")
+        size = payload.get("student_body_size", defaults.student_body_size)
+        if size not in SIZES:
+            raise ValueError(f"student_body_size must be one of {', '.join(SIZES)}")
+        try:
+            importances = {k: int(payload.get(k, getattr(defaults, k)))
+                           for k in ("tuition_importance", "debt_importance", "msi_importance")}
+        except (TypeError, ValueError):
+            raise ValueError("importances must be integers")
+        lo, hi = IMPORTANCE_RANGE
+        for name, value in importances.items():
+            if not lo <= value <= hi:
+                raise ValueError(f"{name} must be between {lo} and {hi}")
+        return cls(state=defaults.state, in_out_pref=in_out_pref,
+                   tuition_range=_range(payload.get("tuition_range", defaults.tuition_range), "tuition_range"),
+                   debt_range=_range(payload.get("debt_range", defaults.debt_range), "debt_range"),
+                   student_body_size=size, msi_required=_flag(payload.get("msi_required", False)),
+                   **importances)
+
+    def query_key(self):
+        return normalize_query(self.state, self.in_out_pref, self.tuition_range, self.debt_range,
+                               self.msi_required, self.student_body_size)
+
+    def weights(self):
+        return user_weights(self.tuition_importance, self.debt_importance, self.msi_importance)
+
+
+@dataclass
+class Selection:
+    """Output of the filter + merge stage for one query key (shared, treat as read-only)."""
+    found_ids: np.ndarray
+    merged: pd.DataFrame
+    candidates: ScoringCandidates = None
+
+    @property
+    def warning(self):
+        if len(self.found_ids) == 0:
+            return "No colleges match your filters."
+        if self.merged.empty:
+            return "After merging datasets, no colleges had the required fields."
+        return None
+
+
+@dataclass
+class Recommendation:
+    ranked: pd.DataFrame
+    selection: Selection = field(repr=False, default=None)
+
+    @property
+    def warning(self):
+        return self.selection.warning if self.selection is not None else None
+
+    @property
+    def unit_ids(self):
+        return self.ranked[ID_COL].to_numpy() if not self.ranked.empty else np.array([], dtype=np.int64)
+
+    @property
+    def scores(self):
+        return self.ranked["score"].to_numpy() if not self.ranked.empty else np.array([], dtype=float)
+
+
+def merge_and_normalize(table, ids, normalization=NORMALIZATION):
+    if len(ids) == 0:
+        return pd.DataFrame()
+    # already joined at load, this is just an indexed row lookup
+    pos = table.positions(ids)
+    merged = table.df[table.base_columns].iloc[pos].reset_index(drop=True)
+    if merged.empty:
+        return merged
+    numeric_cols = table.normalized_cols
+    if not numeric_cols:
+        return merged
+    if normalization == "subset":
+        X = merged[numeric_cols].fillna(0).to_numpy(dtype=float)
+        merged[numeric_cols] = apply_minmax(X, *fit_minmax(X))
+    else:
+        merged[numeric_cols] = table.normalized[pos]
+    return merged
+
+
+def prepare_candidates(merged_df):
+    # numeric feature matrix + name groups, reusable across weight changes
+    return ScoringCandidates.from_frame(merged_df, exclude=(ID_COL,))
+
+
+def score_and_rank_schools(merged_df, user_weights, column_directions, top_k=None):
+    # top_k=None ranks everything (full sort); otherwise only the best top_k distinct names
+    if merged_df.empty:
+        return merged_df
+    return prepare_candidates(merged_df).rank(user_weights, column_directions, top_k)
+
+
+class Engine:
+    """Loaded datasets + indexes + the shared query cache. Safe to share read-only across threads."""
+
+    def __init__(self, affordability_df, college_selected_raw, normalization=NORMALIZATION,
+                 cache_size=512, cache_ttl=3600):
+        # no-op for frames from read_csv_cached, which are already compact
+        self.affordability_df = affordability_df = compact_frame(affordability_df)
+        self.college_selected_raw = college_selected_raw = compact_frame(college_selected_raw)
+        self.normalization = normalization
+        self.version = 0  # set by SnapshotStore when this engine becomes the active snapshot
+        self.institutions = InstitutionTable.build(affordability_df, college_selected_raw)
+        self.query_cache = QueryCache(maxsize=cache_size, ttl=cache_ttl)
+        self.query_cache.bind(self.institutions)
+        # results page chart specs, keyed by (Unit IDs in rank order, chart type)
+        self.chart_cache = QueryCache(maxsize=cache_size, ttl=cache_ttl)
+        self.chart_cache.bind(self.institutions)
+        # details panel payloads, built on first view per institution
+        self.details = DetailPayloads(self.institutions)
+        # name lookups for the notebook helpers (engine.lookups)
+        self.affordability_names = NameIndex(affordability_df["Institution Name"])
+        self.affordability_metrics = MetricTable(affordability_df, self.affordability_names)
+
+    @classmethod
+    def load(cls, affordability_path=AFFORDABILITY_CSV, college_path=COLLEGE_CSV, **kw):
+        return cls(read_csv_cached(affordability_path), read_csv_cached(college_path), **kw)
+
+    def memory_report(self):
+        """One row per in-memory table (see engine.compact.memory_report)."""
+        t = self.institutions
+        return memory_report({
+            "affordability_df": self.affordability_df,
+            "college_selected_raw": self.college_selected_raw,
+            "institutions": t.df,
+            "normalized": t.normalized,
+            "range indexes": [a for i in t.ranges.values() for a in (i.positions, i.values)],
+        })
+
+    def predicates(self, key):
+        state, in_out_pref, tuition_range, debt_range, msi_required, size = key
+        table = self.institutions
+        return [
+            filter_by_state(table, state, in_out_pref),
+            filter_by_tuition(table, tuition_range, in_out_pref, state),
+            filter_by_debt(table, debt_range),
+            filter_by_minority_serving(table, msi_required),
+            filter_by_size(table, size),
+        ]
+
+    def matches(self, key, positions):
+        """Which of the given table positions pass every filter of key."""
+        keep = np.ones(len(positions), dtype=bool)
+        for p in self.predicates(key):
+            if p is not None:
+                keep &= p.build()[positions]
+        return keep
+
+    def select(self, key):
+        """Filter + merge + normalize for a normalize_query() key, cached across callers."""
+        return self.lookup(key)[0]
+
+    def lookup(self, key):
+        """(select(key), hit): hit is False when this call ran the filters itself."""
+        table = self.institutions
+        ran = []
+
+        def run_filters():
+            ran.append(True)
+            #AND the filter bitmaps, most selective first
+            with tracer.span("filter") as span:
+                found_ids = table.ids[combine(len(table), self.predicates(key))]
+                span.rows = len(found_ids)
+            with tracer.span("merge_normalize", len(found_ids)):
+                merged = merge_and_normalize(table, found_ids, self.normalization)
+            with tracer.span("prepare", len(merged)):
+                candidates = prepare_candidates(merged) if not merged.empty else None
+            return Selection(found_ids, merged, candidates)
+        # cache hits are timed too, the stages above only show up on misses
+        with tracer.span("select") as span:
+            selection = self.query_cache.get_or_compute(key, run_filters)
+            span.rows = len(selection.found_ids)
+        return selection, not ran
+
+    def rank(self, selection, weights, top_k=TOP_N):
+        if selection.candidates is None:
+            return pd.DataFrame()
+        with tracer.span("score_rank", len(selection.merged)):
+            return selection.candidates.rank(weights, column_directions(selection.merged.columns), top_k)
+
+    def chart_spec(self, ids, kind="tuition_grid"):
+        """Cached Vega-Lite spec of chart kind over ids in rank order (see engine.charts)."""
+        ids = tuple(int(i) for i in ids)
+        return self.chart_cache.get_or_compute((ids, kind), lambda: chart_spec(self.institutions, ids, kind))
+
+    def detail(self, unit_id):
+        """Display payload for one institution's detail view (see engine.details), or None."""
+        return self.details.get(unit_id)
+
+    def recommend(self, profile, top_k=TOP_N):
+        """Ranked recommendations for a Profile (top_k=None ranks every match)."""
+        selection = self.select(profile.query_key())
+        return Recommendation(self.rank(selection, profile.weights(), top_k), selection)
+
+
+_default_engine = None
+_default_engine_lock = threading.Lock()
+
+
+def get_engine():
+    """Process-wide Engine over the CSVs in the working directory, loaded on first use."""
+    global _default_engine
+    if _default_engine is None:
+        # double-checked so concurrent first callers share one engine (and one query cache)
+        with _default_engine_lock:
+            if _default_engine is None:
+                _default_engine = Engine.load()
+    return _default_engine
+
+
+def recommend(profile, top_k=TOP_N):
+    return get_engine().recommend(profile, top_k)
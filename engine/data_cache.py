@@ -0,0 +1,158 @@
+# typed columnar snapshots of the raw CSVs so workers don't re-parse text on every start
+#
+# first read of a CSV parses it normally and writes one .npy file per column plus a
+# manifest.json under SNAPSHOT_DIR/<csv name>-<hash of its real path>/. later reads check
+# the manifest against the source file size + mtime and, if they match, memory-map the
+# column files instead. each write goes into a fresh v<ns>-<pid>/ directory and then
+# atomically repoints the slot's CURRENT file at it, so a live snapshot is never deleted
+# under a reader; a reader that still loses a race (or finds a damaged file) gets None and
+# parses the CSV.
+# frames are stored in the compact schema (engine.compact), so warm loads map float32/bool
+# columns straight from disk; categorical columns are stored as strings and re-categorized.
+import hashlib
+import json
+import os
+import shutil
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from .compact import compact_frame
+
+SNAPSHOT_DIR = os.environ.get("COLLEGE_SNAPSHOT_DIR", ".snapshot_cache")
+SNAPSHOT_VERSION = 2
+
+# path -> {"mode": "cold"|"warm", "seconds": float, "rows": int}
+load_timings = {}
+
+
+def _source_key(path):
+    st = os.stat(path)
+    return {"size": st.st_size, "mtime_ns": st.st_mtime_ns}
+
+
+def _snapshot_path(path, cache_dir):
+    # same-named CSVs in different places (e.g. bench copies) must not share a slot
+    digest = hashlib.sha1(os.path.realpath(path).encode()).hexdigest()[:16]
+    return os.path.join(cache_dir, f"{os.path.basename(path)}-{digest}")
+
+
+def _live_dir(slot):
+    """The slot's current version directory, per its CURRENT pointer (None if there's none)."""
+    try:
+        with open(os.path.join(slot, "CURRENT")) as f:
+            name = f.read().strip()
+    except OSError:
+        return None
+    return os.path.join(slot, name) if name else None
+
+
+def _read_manifest(snap_dir):
+    try:
+        with open(os.path.join(snap_dir, "manifest.json")) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def write_snapshot(df, path, cache_dir=SNAPSHOT_DIR):
+    """Write df as a column snapshot for the CSV at path (atomically replaces any old one)."""
+    slot = _snapshot_path(path, cache_dir)
+    # each write gets its own version directory; readers only ever see a complete one
+    version = f"v{time.time_ns()}-{os.getpid()}"
+    tmp_dir = os.path.join(slot, version)
+    os.makedirs(tmp_dir)
+    columns = []
+    for i, col in enumerate(df.columns):
+        s = df[col]
+        entry = {"name": col, "file": f"c{i}.npy"}
+        if s.dtype.kind in "biuf":
+            np.save(os.path.join(tmp_dir, entry["file"]), s.to_numpy())
+            entry["kind"] = "numeric"
+        else:
+            # strings go in as fixed-width unicode (mmap-able) with a separate null mask
+            mask = s.isna().to_numpy()
+            np.save(os.path.join(tmp_dir, entry["file"]), s.fillna("").astype(str).to_numpy(dtype=str))
+            entry["kind"] = "string"
+            entry["category"] = isinstance(s.dtype, pd.CategoricalDtype)
+            if mask.any():
+                entry["null_file"] = f"c{i}_null.npy"
+                np.save(os.path.join(tmp_dir, entry["null_file"]), mask)
+        columns.append(entry)
+    manifest = {"version": SNAPSHOT_VERSION, "source": _source_key(path), "rows": len(df), "columns": columns}
+    with open(os.path.join(tmp_dir, "manifest.json"), "w") as f:
+        json.dump(manifest, f)
+    previous = _live_dir(slot)
+    pointer = os.path.join(slot, f"CURRENT.tmp{os.getpid()}")
+    with open(pointer, "w") as f:
+        f.write(version)
+    os.replace(pointer, os.path.join(slot, "CURRENT"))
+    # drop older versions, but leave the one just replaced to readers that picked it up
+    keep = {version, os.path.basename(previous) if previous else None}
+    for name in os.listdir(slot):
+        if name.startswith("v") and name not in keep:
+            shutil.rmtree(os.path.join(slot, name), ignore_errors=True)
+
+
+def read_snapshot(path, cache_dir=SNAPSHOT_DIR):
+    """Return the snapshot DataFrame for path, or None if it's missing, stale or unreadable."""
+    snap_dir = _live_dir(_snapshot_path(path, cache_dir))
+    if snap_dir is None:
+        return None
+    manifest = _read_manifest(snap_dir)
+    if manifest is None or manifest.get("version") != SNAPSHOT_VERSION:
+        return None
+    if manifest["source"] != _source_key(path):
+        return None
+    data = {}
+    try:
+        for entry in manifest["columns"]:
+            arr = np.load(os.path.join(snap_dir, entry["file"]), mmap_mode="r")
+            if entry["kind"] == "string":
+                arr = arr.astype(object)
+                if "null_file" in entry:
+                    arr[np.load(os.path.join(snap_dir, entry["null_file"]))] = np.nan
+                if entry.get("category"):
+                    arr = pd.Categorical(arr)
+            data[entry["name"]] = arr
+    except (OSError, ValueError):
+        # removed by a concurrent writer or half-written: fall back to the CSV
+        return None
+    return pd.DataFrame(data, copy=False)
+
+
+def read_csv_cached(path, cache_dir=SNAPSHOT_DIR):
+    """compact_frame(pd.read_csv(path)), served from the typed snapshot when the CSV hasn't changed."""
+    start = time.perf_counter()
+    df = read_snapshot(path, cache_dir)
+    mode = "warm"
+    if df is None:
+        mode = "cold"
+        df = compact_frame(pd.read_csv(path))
+        try:
+            write_snapshot(df, path, cache_dir)
+        except OSError as e:
+            # read-only deploys still work, they just never get warm starts
+            print(f"Could not write snapshot for {path}: {e}")
+    load_timings[path] = {"mode": mode, "seconds": time.perf_counter() - start, "rows": len(df)}
+    return df
+
+
+def _format_timing(path, t):
+    return f"{os.path.basename(path)}: {t['mode']} load, {t['rows']:,} rows in {t['seconds'] * 1000:.1f} ms"
+
+
+def format_load_timings():
+    return "\n".join(_format_timing(p, t) for p, t in load_timings.items())
+
+
+if __name__ == "__main__":
+    # python -m engine.data_cache college_selected_raw.csv  -> cold vs warm load times
+    paths = sys.argv[1:] or ["affordability_raw.csv", "college_selected_raw.csv"]
+    for p in paths:
+        shutil.rmtree(_snapshot_path(p, SNAPSHOT_DIR), ignore_errors=True)
+        for _ in range(2):
+            read_csv_cached(p)
+            print(_format_timing(p, load_timings[p]))
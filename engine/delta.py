@@ -0,0 +1,111 @@
+# incremental corrections: apply a small file of changed rows without reloading
+#
+# a delta is a CSV (or frame) of rows keyed by "Unit ID" or
+# UNIQUE_IDENTIFICATION_NUMBER_OF_THE_INSTITUTION, holding only the columns that changed;
+# empty cells mean "unchanged". apply_delta() returns a new Engine and leaves the old one
+# untouched (it may still be serving requests):
+#   - the raw frames get the new values on their matching rows
+#   - the institution table is patched in place of a rebuild: range index entries, the MSI
+#     bitmap and normalization bounds of the touched rows/columns (a state change regroups
+#     the rows, so that case falls back to rebuilding the table from the patched frames)
+#   - the name index only re-posts renamed institutions
+#   - cached query results are kept unless they contained a changed institution or one of
+#     the changed institutions passes their filters now; a moved normalization bound (which
+#     rescales every row) or a rebuild drops them all
+#   - cached chart specs and detail payloads are kept unless they show a changed institution
+#
+# deltas live in memory only; a refresh from the CSVs on disk replaces them.
+import copy
+
+import numpy as np
+import pandas as pd
+
+from .details import DetailPayloads
+from .institution_table import InstitutionTable, ID_COL, AFF_ID_COL, assign_rows
+from .metrics import MetricTable, NAME_COL
+
+
+def read_delta(source):
+    """Delta rows (path, file object or frame) -> frame indexed by Unit ID."""
+    df = source if isinstance(source, pd.DataFrame) else pd.read_csv(source)
+    id_col = ID_COL if ID_COL in df.columns else AFF_ID_COL
+    if id_col not in df.columns:
+        raise ValueError(f"a delta needs a {AFF_ID_COL!r} or {ID_COL!r} column")
+    ids = pd.to_numeric(df[id_col], errors="coerce")
+    if ids.isna().any():
+        raise ValueError("delta rows with a missing or non-numeric Unit ID")
+    df = df.drop(columns=[c for c in (ID_COL, AFF_ID_COL) if c in df.columns])
+    df.index = pd.Index(ids.astype(np.int64).to_numpy())
+    if df.index.has_duplicates:
+        raise ValueError("a delta may list each Unit ID once")
+    return df
+
+
+def patch_frame(df, id_col, delta):
+    """Copy of df with delta's non-null values written onto the rows with matching ids."""
+    cols = [c for c in delta.columns if c in df.columns]
+    rows = np.flatnonzero(df[id_col].isin(delta.index).to_numpy())
+    if not cols or len(rows) == 0:
+        return df, rows
+    out = df.copy()
+    updates = delta.reindex(out[id_col].to_numpy()[rows])
+    for col in cols:
+        given = updates[col].notna().to_numpy()
+        if not given.any():
+            continue
+        out[col] = assign_rows(out[col], rows[given], updates[col].to_numpy()[given])
+    return out, rows
+
+
+def apply_delta(engine, delta):
+    """(new Engine, report) with delta applied; engine itself is not modified."""
+    delta = read_delta(delta)
+    known = set(engine.affordability_df[AFF_ID_COL]) | set(engine.college_selected_raw[ID_COL])
+    unknown = [i for i in delta.index if i not in known]
+    if unknown:
+        raise ValueError(f"unknown Unit IDs (deltas only change existing institutions): {unknown}")
+
+    aff, aff_rows = patch_frame(engine.affordability_df, AFF_ID_COL, delta)
+    college, _ = patch_frame(engine.college_selected_raw, ID_COL, delta)
+
+    table = engine.institutions
+    in_table = delta[[i in table for i in delta.index]]
+    in_table = in_table[[c for c in in_table.columns if c in table.df.columns]]
+    rebuilt = False
+    try:
+        new_table, renormalized = table.patched(in_table)
+    except ValueError:
+        new_table, renormalized, rebuilt = InstitutionTable.build(aff, college), True, True
+
+    new = copy.copy(engine)
+    new.affordability_df = aff
+    new.college_selected_raw = college
+    new.institutions = new_table
+    if NAME_COL in delta.columns and len(aff_rows):
+        new.affordability_names = engine.affordability_names.patched(aff_rows, aff[NAME_COL].to_numpy()[aff_rows])
+    new.affordability_metrics = MetricTable(aff, new.affordability_names)
+
+    # global normalization bakes the bounds into every cached merged frame
+    drop_all = rebuilt or (renormalized and engine.normalization == "global")
+    changed_ids = in_table.index.to_numpy()
+    changed_pos = new_table.positions(changed_ids)
+    drop = []
+    for key, selection in engine.query_cache.items():
+        if (drop_all or np.isin(selection.found_ids, changed_ids).any()
+                or new.matches(key, changed_pos).any()):
+            drop.append(key)
+    new.query_cache = engine.query_cache.derive(new_table, drop)
+    charts_drop = [key for key, _ in engine.chart_cache.items() if rebuilt or np.isin(key[0], changed_ids).any()]
+    new.chart_cache = engine.chart_cache.derive(new_table, charts_drop)
+    new.details = DetailPayloads(new_table) if rebuilt else engine.details.derive(new_table, changed_ids.tolist())
+
+    report = {"rows": len(delta), "columns": list(delta.columns), "rebuilt": rebuilt,
+              "renormalized": bool(renormalized), "cache_dropped": len(drop), "cache_kept": len(new.query_cache)}
+    return new, report
+
+
+def format_report(report):
+    how = "rebuilt" if report["rebuilt"] else "patched"
+    bounds = ", normalization bounds moved" if report["renormalized"] else ""
+    return (f"delta: {report['rows']} institution(s), {len(report['columns'])} column(s), table {how}{bounds}; "
+            f"{report['cache_dropped']} cached queries dropped, {report['cache_kept']} kept")
@@ -0,0 +1,102 @@
+# precomputed payloads for the "Selected College — Details" panel
+#
+# the panel used to pull a row, build tuition / debt / demographics frames cell by cell and
+# work out the debt-to-earnings ratio on every rerun. DetailPayloads computes the numbers
+# for every institution at once when a snapshot is built (the ratio, the race/ethnicity
+# matrix - plain numpy over the table's columns) and turns one institution's row of them
+# into a payload the first time it's asked for:
+#   name, state, enrollment, msi, grant, earnings, dependent_debt, independent_debt
+#                       display strings ("$12,345", "N/A", "Yes"/"No")
+#   debt_to_earnings    float or None (dependent debt / earnings, when earnings > 0)
+#   tuition             [{"Category", "Cost"}], demographics [{"race", "pct"}] (long format)
+#   charts              Vega-Lite specs for the three tabs (None when there's nothing to draw)
+# payloads are memoized per Unit ID (bounded LRU), so drawing the panel again is one lookup.
+import numpy as np
+
+from .charts import TUITION_TYPES, debt_gauge, demographics_donut, tuition_breakdown
+from .institution_table import STATE_COL, DEPENDENT_DEBT, INDEPENDENT_DEBT, ENROLLMENT
+from .metrics import NAME_COL
+from .query_cache import QueryCache
+
+EARNINGS = "Median Earnings of Students Working and Not Enrolled 10 Years After Entry"
+GRANT = "Average Amount of Institutional Grant Aid Awarded to First-Time, Full-Time Undergraduates"
+RACE_COLUMNS = {
+    "American Indian or Alaska Native": "Percent of American Indian or Alaska Native Undergraduates",
+    "Two or More Races": "Percent of Two or More Races Undergraduates",
+    "Asian": "Percent of Asian Undergraduates",
+    "Black": "Percent of Black or African American Undergraduates",
+    "Latino": "Percent of Latino Undergraduates",
+    "Native Hawaiian or Other Pacific Islander": "Percent of Native Hawaiian or Other Pacific Islander Undergraduates",
+    "White": "Percent of White Undergraduates",
+    "Unknown": "Percent of Undergraduates Race-Ethnicity Unknown",
+}
+DOLLAR_COLS = {"grant": GRANT, "earnings": EARNINGS, "dependent_debt": DEPENDENT_DEBT,
+               "independent_debt": INDEPENDENT_DEBT}
+
+
+def money(value):
+    return f"${int(value):,}" if not np.isnan(value) else "N/A"
+
+
+def count(value):
+    return f"{int(value):,}" if not np.isnan(value) else "N/A"
+
+
+class DetailPayloads:
+    def __init__(self, table, maxsize=4096):
+        self.table = table
+        df = table.df
+
+        def column(col):
+            return df[col].to_numpy(dtype=float) if col in df.columns else np.full(len(df), np.nan)
+
+        def text(col, missing):
+            # missing values would otherwise format as "nan"
+            if col not in df.columns:
+                return np.full(len(df), missing, dtype=object)
+            return df[col].astype(object).where(df[col].notna(), missing).to_numpy()
+        self.dollars = {key: column(col) for key, col in DOLLAR_COLS.items()}
+        self.enrollment = column(ENROLLMENT)
+        self.tuition = np.column_stack([column(c) for c in TUITION_TYPES.values()])
+        earnings, debt = self.dollars["earnings"], self.dollars["dependent_debt"]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            self.debt_to_earnings = np.where((earnings > 0) & ~np.isnan(debt), debt / earnings, np.nan)
+        self.race_labels = [label for label, col in RACE_COLUMNS.items() if col in df.columns]
+        self.race = np.column_stack([column(RACE_COLUMNS[label]) for label in self.race_labels]) \
+            if self.race_labels else np.empty((len(df), 0))
+        self.msi = table.msi
+        self.names = text(NAME_COL, "Unknown")
+        self.states = text(STATE_COL, "N/A")
+        self.cache = QueryCache(maxsize=maxsize, ttl=None)
+        self.cache.bind(table)
+
+    def derive(self, table, drop=()):
+        """Payloads over a patched table, keeping memoized ones except for the Unit IDs in drop."""
+        out = DetailPayloads(table, self.cache.maxsize)
+        out.cache = self.cache.derive(table, drop)
+        return out
+
+    def get(self, unit_id):
+        """The payload for unit_id, or None for an unknown Unit ID."""
+        return self.cache.get_or_compute(int(unit_id), lambda: self._build(int(unit_id)))
+
+    def _build(self, unit_id):
+        pos = self.table.df.index.get_indexer([unit_id])[0]
+        if pos < 0:
+            return None
+        tuition = [{"Category": label, "Cost": float(v)}
+                   for label, v in zip(TUITION_TYPES, self.tuition[pos]) if not np.isnan(v)]
+        demographics = [{"race": label, "pct": float(v)}
+                        for label, v in zip(self.race_labels, self.race[pos]) if not np.isnan(v)]
+        ratio = self.debt_to_earnings[pos]
+        ratio = None if np.isnan(ratio) else float(ratio)
+        payload = {"unit_id": unit_id, "name": str(self.names[pos]), "state": str(self.states[pos]),
+                   "enrollment": count(self.enrollment[pos]), "msi": "Yes" if self.msi[pos] else "No",
+                   **{key: money(values[pos]) for key, values in self.dollars.items()},
+                   "debt_to_earnings": ratio, "tuition": tuition, "demographics": demographics}
+        payload["charts"] = {
+            "tuition": tuition_breakdown(tuition) if tuition else None,
+            "debt_to_earnings": debt_gauge(ratio) if ratio is not None else None,
+            "demographics": demographics_donut(demographics) if demographics else None,
+        }
+        return payload
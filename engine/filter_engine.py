@@ -0,0 +1,50 @@
+# bitmap filter composition for the recommendation filters
+#
+# every filter is a Predicate: a cheap row-count estimate plus a function producing a
+# row-position bitmap (numpy bool array over the institution table). combine() runs the
+# most selective predicates first, ANDs the bitmaps and stops as soon as nothing is left.
+# filters that wouldn't remove anything ("I don't care", MSI not required) are just None.
+# estimates may overcount but must never undercount: an estimate of 0 skips the build.
+import numpy as np
+
+
+class Predicate:
+    def __init__(self, name, estimate, build):
+        self.name = name
+        self.estimate = estimate  # expected number of matching rows
+        self.build = build        # () -> bool array of length n
+
+    def __repr__(self):
+        return f"Predicate({self.name!r}, estimate={self.estimate})"
+
+
+def positions_mask(n, positions):
+    mask = np.zeros(n, dtype=bool)
+    mask[positions] = True
+    return mask
+
+
+def slice_mask(n, sl):
+    mask = np.zeros(n, dtype=bool)
+    mask[sl] = True
+    return mask
+
+
+def combine(n, predicates, stats=None):
+    """AND together the bitmaps of predicates (None entries are no-ops), most selective first.
+
+    If stats is a list, (name, estimate, rows_left) is appended for each predicate evaluated.
+    """
+    active = sorted((p for p in predicates if p is not None), key=lambda p: p.estimate)
+    result = np.ones(n, dtype=bool)
+    for p in active:
+        if p.estimate == 0:
+            result[:] = False
+        else:
+            result &= p.build()
+        left = int(np.count_nonzero(result))
+        if stats is not None:
+            stats.append((p.name, p.estimate, left))
+        if left == 0:
+            break
+    return result
@@ -0,0 +1,51 @@
+# the sidebar filters, as Predicates over an InstitutionTable
+#
+# each filter returns a Predicate (row bitmap + size estimate), or None when it can't
+# exclude anything; filter_engine.combine() ANDs them together.
+from .filter_engine import Predicate
+from .institution_table import IN_STATE_TUITION, OUT_STATE_TUITION, DEPENDENT_DEBT, ENROLLMENT
+
+
+def filter_by_state(table, state, in_out_pref):
+    return table.state_predicate(state, in_out_pref)
+
+
+def filter_by_tuition(table, tuition_range, in_out_pref, state):
+    lower, upper = tuple(tuition_range)
+    lower *= 1000
+    upper *= 1000
+    if in_out_pref == "In-State":
+        return table.range_predicate("tuition", IN_STATE_TUITION, lower, upper)
+    if in_out_pref == "Out-of-State":
+        return table.range_predicate("tuition", OUT_STATE_TUITION, lower, upper)
+    # in-state schools priced at in-state tuition, everyone else at out-of-state
+    in_pred = table.range_predicate("in-state tuition", IN_STATE_TUITION, lower, upper)
+    out_pred = table.range_predicate("out-of-state tuition", OUT_STATE_TUITION, lower, upper)
+    in_state = table.state_slice(state)
+
+    def build():
+        mask = out_pred.build()
+        mask[in_state] = in_pred.build()[in_state]
+        return mask
+    return Predicate("tuition", in_pred.estimate + out_pred.estimate, build)
+
+
+def filter_by_debt(table, debt_range):
+    lower, upper = tuple(debt_range)
+    lower *= 1000
+    upper *= 1000
+    return table.range_predicate("debt", DEPENDENT_DEBT, lower, upper)
+
+
+def filter_by_minority_serving(table, require_msi):
+    if not require_msi:
+        return None
+    return Predicate("msi", int(table.msi.sum()), lambda: table.msi)
+
+
+def filter_by_size(table, size_choice):
+    if size_choice == "Small":
+        return table.range_predicate("size", ENROLLMENT, upper=5000)
+    if size_choice == "Medium":
+        return table.range_predicate("size", ENROLLMENT, 5000, 15000, left_open=True)
+    return table.range_predicate("size", ENROLLMENT, 15000, left_open=True)
@@ -0,0 +1,214 @@
+# build the app's working CSVs from raw exports, streaming
+#
+#   python -m engine.ingest --college scorecard_2019.csv scorecard_2020.csv \
+#       --affordability affordability_full.csv --out-dir . [--ids ids.txt]
+#
+# the raw files can have thousands of columns. each one is read in chunks with usecols set
+# to the columns the app actually uses (the notebook column lists + the tuition, debt,
+# earnings and enrollment fields), so pandas never materializes the rest, and every kept
+# column is cast to a compact dtype (float32 numbers, category strings) as the chunk comes
+# in. each chunk is deduplicated by Unit ID and kept in a list that's concatenated and
+# deduplicated across chunks once at the end; if repeated Unit IDs make the held rows double
+# since the last collapse, the list is collapsed early. so peak memory stays within a small
+# multiple of institutions x used columns, not the size or number of the inputs, and the
+# work stays linear in the input. with several (e.g. yearly) files, a Unit ID's row from a
+# later file replaces the earlier one.
+#
+# Scorecard-style privacy markers ("PrivacySuppressed", "NULL", ...) become NaN.
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from .core import AFFORDABILITY_CSV, COLLEGE_CSV
+from .institution_table import (ID_COL, AFF_ID_COL, STATE_COL, AFFORDABILITY_COLS, IN_STATE_TUITION,
+                                OUT_STATE_TUITION, DEPENDENT_DEBT, INDEPENDENT_DEBT, ENROLLMENT)
+from .metrics import (MSI_Type, NAME_COL, degree_years, percent_bachelors_by_race,
+                      percent_bachelors_by_field)
+
+CHUNKSIZE = 50_000
+
+UNDERGRAD_RACE_COLS = [
+    "Percent of American Indian or Alaska Native Undergraduates",
+    "Percent of Two or More Races Undergraduates",
+    "Percent of Asian Undergraduates",
+    "Percent of Black or African American Undergraduates",
+    "Percent of Latino Undergraduates",
+    "Percent of Native Hawaiian or Other Pacific Islander Undergraduates",
+    "Percent of White Undergraduates",
+    "Percent of Undergraduates Race-Ethnicity Unknown",
+    "Percent of Nonresident Undergraduates",
+]
+
+COST_OUTCOME_COLS = [
+    "Median Earnings of Students Working and Not Enrolled 10 Years After Entry",
+    DEPENDENT_DEBT,
+    INDEPENDENT_DEBT,
+    "Percent of Part-Time Undergraduates",
+    IN_STATE_TUITION,
+    OUT_STATE_TUITION,
+    "Average Amount of Loans Awarded to First-Time, Full-Time Undergraduates",
+    "Average Amount of Federal Grant Aid Awarded to First-Time, Full-Time Undergraduates",
+    "Average Amount of Institutional Grant Aid Awarded to First-Time, Full-Time Undergraduates",
+    ENROLLMENT,
+]
+
+# output column order = bundled college_selected_raw.csv
+COLLEGE_COLUMNS = ([ID_COL] + UNDERGRAD_RACE_COLS + percent_bachelors_by_race
+                   + percent_bachelors_by_field + COST_OUTCOME_COLS)
+
+# the lookup helpers read the notebook column lists off the affordability table too
+AFFORDABILITY_COLUMNS = list(dict.fromkeys(
+    [AFF_ID_COL, NAME_COL, STATE_COL, "Sector Name"] + list(MSI_Type.values()) + AFFORDABILITY_COLS
+    + ["Weekly Hours to Close Gap", "Income Earned from Working 10 Hours a Week at State's Minimum Wage",
+       ENROLLMENT] + degree_years + COLLEGE_COLUMNS[1:]))
+
+# text columns; everything else is numeric
+CATEGORY_COLS = {STATE_COL, "Sector Name"}
+TEXT_COLS = {NAME_COL}
+MISSING_MARKERS = ["PrivacySuppressed", "PS", "NULL", "NA", "N/A", ""]
+
+
+def project(header, wanted, id_col, rename=None):
+    """Raw header -> (raw columns to read, raw -> output name). Missing id column is an error."""
+    rename = rename or {}
+    out_to_raw = {rename.get(c, c): c for c in header}
+    if id_col not in out_to_raw:
+        raise ValueError(f"no {id_col!r} column (after renaming) in the input")
+    keep = [c for c in wanted if c in out_to_raw]
+    return [out_to_raw[c] for c in keep], {out_to_raw[c]: c for c in keep}
+
+
+def compact(chunk, id_col):
+    """Cast one chunk in place to the working dtypes."""
+    for col in chunk.columns:
+        if col == id_col:
+            chunk[col] = pd.to_numeric(chunk[col], errors="coerce")
+        elif col in CATEGORY_COLS:
+            chunk[col] = chunk[col].astype("category")
+        elif col not in TEXT_COLS:
+            chunk[col] = pd.to_numeric(chunk[col], errors="coerce").astype(np.float32)
+    chunk.dropna(subset=[id_col], inplace=True)
+    chunk[id_col] = chunk[id_col].astype(np.int64)
+    return chunk
+
+
+def _merge(parts, id_col):
+    """One frame from parts (oldest first), one row per Unit ID (later rows win)."""
+    df = pd.concat(parts, ignore_index=True) if len(parts) > 1 else parts[0]
+    # chunks with different category levels concat to object, re-categorize
+    for col in CATEGORY_COLS.intersection(df.columns):
+        df[col] = df[col].astype("category")
+    return df.drop_duplicates(subset=id_col, keep="last").reset_index(drop=True)
+
+
+def stream_table(paths, wanted, id_col, ids=None, rename=None, chunksize=CHUNKSIZE, stats=None):
+    """Projected, compacted, Unit ID-deduped frame over one or more raw files (later files win)."""
+    parts, held, merged = [], 0, 0
+    for path in paths:
+        header = pd.read_csv(path, nrows=0).columns
+        usecols, names = project(header, wanted, id_col, rename)
+        missing = [c for c in wanted if c not in names.values()]
+        # everything as text first: Scorecard mixes numbers with privacy markers
+        reader = pd.read_csv(path, usecols=usecols, dtype=str, chunksize=chunksize,
+                             na_values=MISSING_MARKERS, keep_default_na=True)
+        rows_in = 0
+        for chunk in reader:
+            rows_in += len(chunk)
+            chunk = compact(chunk.rename(columns=names), id_col)
+            if ids is not None:
+                chunk = chunk[chunk[id_col].isin(ids)]
+            if len(chunk):
+                parts.append(chunk.drop_duplicates(subset=id_col, keep="last"))
+                held += len(parts[-1])
+                if held > 2 * max(merged, chunksize):
+                    # repeated Unit IDs across chunks/files: collapse once the held rows have
+                    # doubled since the last collapse (amortized linear, memory <= ~2x unique)
+                    parts = [_merge(parts, id_col)]
+                    held = merged = len(parts[0])
+        if stats is not None:
+            stats.append({"file": path, "rows_read": rows_in, "columns_in_file": len(header),
+                          "columns_kept": len(usecols), "missing": missing})
+    if not parts:
+        return pd.DataFrame(columns=wanted)
+    df = _merge(parts, id_col)
+    return df[[c for c in wanted if c in df.columns]]
+
+
+def peak_rss_mb():
+    try:
+        import resource
+    except ImportError:  # windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def ingest(college_paths=(), affordability_paths=(), out_dir=".", ids=None, rename=None,
+           chunksize=CHUNKSIZE):
+    """Write the working CSVs for whichever inputs are given; returns a report dict."""
+    report = {"tables": {}}
+    start = time.perf_counter()
+    for paths, wanted, id_col, out_name in ((college_paths, COLLEGE_COLUMNS, ID_COL, COLLEGE_CSV),
+                                            (affordability_paths, AFFORDABILITY_COLUMNS, AFF_ID_COL,
+                                             AFFORDABILITY_CSV)):
+        if not paths:
+            continue
+        stats = []
+        df = stream_table(paths, wanted, id_col, ids, rename, chunksize, stats)
+        out = os.path.join(out_dir, out_name)
+        tmp = out + ".tmp"
+        df.to_csv(tmp, index=False)
+        os.replace(tmp, out)
+        report["tables"][out_name] = {"rows": len(df), "columns": len(df.columns),
+                                      "memory_mb": round(df.memory_usage(deep=True).sum() / 2**20, 2),
+                                      "inputs": stats}
+    report["seconds"] = round(time.perf_counter() - start, 2)
+    report["peak_rss_mb"] = peak_rss_mb()
+    return report
+
+
+def format_report(report):
+    lines = []
+    for name, t in report["tables"].items():
+        lines.append(f"{name}: {t['rows']} rows x {t['columns']} columns ({t['memory_mb']} MB in memory)")
+        for s in t["inputs"]:
+            lines.append(f"  {s['file']}: {s['rows_read']} rows, kept {s['columns_kept']} of "
+                         f"{s['columns_in_file']} columns")
+            if s["missing"]:
+                lines.append(f"    not in file: {', '.join(s['missing'])}")
+    peak = report["peak_rss_mb"]
+    lines.append(f"{report['seconds']}s" + (f", peak RSS {peak:.0f} MB" if peak else ""))
+    return "\n".join(lines)
+
+
+def read_ids(path):
+    with open(path) as f:
+        return {int(tok) for tok in f.read().replace(",", " ").split()}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="project raw exports into the app's working CSVs")
+    parser.add_argument("--college", nargs="*", default=[], help="raw college/Scorecard CSVs, oldest first")
+    parser.add_argument("--affordability", nargs="*", default=[], help="raw affordability CSVs, oldest first")
+    parser.add_argument("--out-dir", default=".")
+    parser.add_argument("--ids", help="file of Unit IDs to keep (whitespace or comma separated)")
+    parser.add_argument("--rename", help="JSON object mapping raw column names to the app's names")
+    parser.add_argument("--chunksize", type=int, default=CHUNKSIZE)
+    args = parser.parse_args()
+    if not args.college and not args.affordability:
+        parser.error("give --college and/or --affordability inputs")
+    rename = None
+    if args.rename:
+        with open(args.rename) as f:
+            rename = json.load(f)
+    try:
+        report = ingest(args.college, args.affordability, args.out_dir,
+                        read_ids(args.ids) if args.ids else None, rename, args.chunksize)
+    except ValueError as e:
+        raise SystemExit(str(e))
+    print(format_report(report))
@@ -0,0 +1,216 @@
+# one joined, Unit ID indexed table of every institution, built once at load
+#
+# college_selected_raw and affordability_df are joined here (inner join on Unit ID, same as
+# merge_and_normalize used to do per request) so filters, scoring and the detail view can
+# look institutions up by ID instead of masking + merging both frames every time.
+#
+# rows are kept grouped by state, so each state is one contiguous row range and the
+# in-state / out-of-state split is a slice instead of an .isin over every row.
+#
+# patched() applies corrected values for a few institutions to a copy of the table,
+# updating the affected index entries and normalization bounds instead of rebuilding.
+import copy
+
+import numpy as np
+import pandas as pd
+
+from .filter_engine import Predicate, positions_mask, slice_mask
+from .range_index import SortedColumnIndex
+from .scoring import fit_minmax, apply_minmax
+
+ID_COL = "UNIQUE_IDENTIFICATION_NUMBER_OF_THE_INSTITUTION"
+AFF_ID_COL = "Unit ID"
+STATE_COL = "State Abbreviation"
+
+# affordability columns the recommendation frame has always carried
+AFFORDABILITY_COLS = ["Unit ID", "Institution Name", "MSI Status", "Average Work Study Award",
+                      "Affordability Gap (net price minus income earned working 10 hrs at min wage)",
+                      "State Abbreviation"]
+
+IN_STATE_TUITION = "Average In-State Tuition for First-Time, Full-Time Undergraduates"
+OUT_STATE_TUITION = "Out-of-State Average Tuition for First-Time, Full-Time Undergraduates"
+DEPENDENT_DEBT = "Median Debt for Dependent Students"
+INDEPENDENT_DEBT = "Median Debt for Independent Students"
+ENROLLMENT = "Number of Undergraduates Enrolled"
+
+# columns the sidebar sliders filter on get a sorted index
+RANGE_COLS = [IN_STATE_TUITION, OUT_STATE_TUITION, DEPENDENT_DEBT, INDEPENDENT_DEBT, ENROLLMENT]
+
+# columns merge_and_normalize min-max scales for scoring
+NORMALIZE_COLS = [
+    "Median Earnings of Students Working and Not Enrolled 10 Years After Entry",
+    DEPENDENT_DEBT,
+    INDEPENDENT_DEBT,
+    IN_STATE_TUITION,
+    OUT_STATE_TUITION,
+    "Average Amount of Loans Awarded to First-Time, Full-Time Undergraduates",
+    "Average Amount of Federal Grant Aid Awarded to First-Time, Full-Time Undergraduates",
+    "Average Amount of Institutional Grant Aid Awarded to First-Time, Full-Time Undergraduates",
+    "Average Work Study Award",
+    "Affordability Gap (net price minus income earned working 10 hrs at min wage)",
+]
+
+
+def assign_rows(series, rows, new):
+    """Copy of series with the values at positions rows replaced, keeping bool/category dtypes."""
+    new = np.asarray(new)
+    if series.dtype == bool:
+        new = new == 1
+    values = series.to_numpy(copy=True)
+    if values.dtype.kind in "iu" and new.dtype.kind == "f":
+        values = values.astype(float)
+    elif values.dtype.kind != "O" and new.dtype.kind == "O":
+        values = values.astype(object)
+    values[rows] = new
+    out = pd.Series(values, index=series.index, name=series.name)
+    return out.astype("category") if isinstance(series.dtype, pd.CategoricalDtype) else out
+
+
+class InstitutionTable:
+    def __init__(self, df, base_columns=None):
+        # df must be indexed by unique Unit ID; rows get grouped by state (stable, NaN last)
+        if STATE_COL in df.columns:
+            df = df.sort_values(STATE_COL, kind="stable", na_position="last")
+        self.df = df
+        self.ids = df.index.to_numpy()
+        # columns of the old per-request merge (college_selected_raw + AFFORDABILITY_COLS)
+        self.base_columns = base_columns if base_columns is not None else list(df.columns)
+        self.ranges = {col: SortedColumnIndex(df[col].to_numpy()) for col in RANGE_COLS if col in df.columns}
+        self.msi = (df["MSI Status"] == 1).to_numpy() if "MSI Status" in df.columns else np.zeros(len(df), bool)
+        self.state_slices = self._state_slices()
+        # dataset-wide min-max normalization (NaN -> 0 before fitting, like the old MinMaxScaler path)
+        self.normalized_cols = [c for c in NORMALIZE_COLS if c in df.columns]
+        raw = df[self.normalized_cols].fillna(0).to_numpy(dtype=float)
+        self.norm_min, self.norm_max = fit_minmax(raw)
+        self.normalized = apply_minmax(raw, self.norm_min, self.norm_max)
+        # sorted, for the sidebar selectbox
+        self.states = list(self.state_slices)
+
+    def _state_slices(self):
+        if STATE_COL not in self.df.columns or len(self.df) == 0:
+            return {}
+        col = self.df[STATE_COL]
+        valid = int(col.notna().sum())  # NaN states sort last and get no slice
+        vals = col.to_numpy()[:valid]
+        starts = np.flatnonzero(np.r_[True, vals[1:] != vals[:-1]]) if valid else np.array([], int)
+        stops = np.r_[starts[1:], valid]
+        return {vals[a]: slice(int(a), int(b)) for a, b in zip(starts, stops)}
+
+    @classmethod
+    def build(cls, affordability_df, college_selected_raw):
+        college = college_selected_raw.drop_duplicates(subset=ID_COL, keep="first")
+        aff = affordability_df.drop_duplicates(subset=AFF_ID_COL, keep="first")
+        # college_selected_raw wins when both files carry the same column
+        aff_cols = [c for c in aff.columns if c not in college.columns]
+        joined = college.merge(aff[aff_cols], left_on=ID_COL, right_on=AFF_ID_COL, how="inner")
+        joined.index = pd.Index(joined[ID_COL].to_numpy())
+        # the column order merge_and_normalize produced, then everything else
+        front = list(college.columns) + [c for c in AFFORDABILITY_COLS if c in joined.columns]
+        joined = joined[front + [c for c in joined.columns if c not in front]]
+        return cls(joined, base_columns=front)
+
+    def patched(self, updates):
+        """Copy with updates applied (frame indexed by Unit ID, NaN = unchanged).
+
+        Returns (table, renormalized); renormalized is True when a min/max bound moved, which
+        changes the normalized values of every row. Raises ValueError for unknown Unit IDs or
+        state changes (those regroup the rows, use build()).
+        """
+        pos = self.df.index.get_indexer(updates.index)
+        if (pos < 0).any():
+            raise ValueError(f"unknown Unit IDs: {list(updates.index[pos < 0])}")
+        if STATE_COL in updates.columns:
+            new_state = updates[STATE_COL]
+            old_state = self.df[STATE_COL].to_numpy()[pos]
+            if (new_state.notna().to_numpy() & (new_state.to_numpy() != old_state)).any():
+                raise ValueError("state changes regroup the table, rebuild it")
+        out = copy.copy(self)
+        out.df = self.df.copy()
+        out.ranges = dict(self.ranges)
+        changed = {}
+        for col in updates.columns:
+            if col not in out.df.columns:
+                continue
+            given = updates[col].notna().to_numpy()
+            if not given.any():
+                continue
+            out.df[col] = assign_rows(out.df[col], pos[given], updates[col].to_numpy()[given])
+            changed[col] = pos[given]
+        for col, rows in changed.items():
+            if col in out.ranges:
+                out.ranges[col] = self.ranges[col].patched(rows, out.df[col].to_numpy(dtype=float)[rows])
+        if "MSI Status" in changed:
+            out.msi = (out.df["MSI Status"] == 1).to_numpy()
+        renormalized = False
+        norm_changed = [c for c in out.normalized_cols if c in changed]
+        if norm_changed:
+            out.normalized = self.normalized.copy()
+            out.norm_min, out.norm_max = self.norm_min.copy(), self.norm_max.copy()
+            for col in norm_changed:
+                j = out.normalized_cols.index(col)
+                rows = changed[col]
+                column = out.df[col].fillna(0).to_numpy(dtype=float)
+                old = self.df[col].fillna(0).to_numpy(dtype=float)[rows]
+                lo, hi = out.norm_min[j], out.norm_max[j]
+                # a bound can only move if a new value passes it or a row sitting on it changed
+                if (column[rows] < lo).any() or (column[rows] > hi).any() or (old == lo).any() or (old == hi).any():
+                    lo, hi = column.min(), column.max()
+                if lo != out.norm_min[j] or hi != out.norm_max[j]:
+                    out.norm_min[j], out.norm_max[j] = lo, hi
+                    out.normalized[:, j] = apply_minmax(column, lo, hi)
+                    renormalized = True
+                else:
+                    out.normalized[rows, j] = apply_minmax(column[rows], lo, hi)
+        return out, renormalized
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __contains__(self, unit_id):
+        return unit_id in self.df.index
+
+    def positions(self, ids):
+        """Row positions for ids (unknown IDs dropped), in table order."""
+        pos = self.df.index.get_indexer(np.asarray(list(ids)))
+        return np.sort(pos[pos >= 0])
+
+    def rows(self, ids, columns=None):
+        """Rows for ids as a fresh frame with a 0..n-1 index, in table order."""
+        df = self.df if columns is None else self.df[columns]
+        return df.iloc[self.positions(ids)].reset_index(drop=True)
+
+    def take(self, ids, columns=None):
+        """Rows for ids in the order given (unknown IDs dropped), indexed by Unit ID."""
+        pos = self.df.index.get_indexer(np.asarray(ids))
+        df = self.df if columns is None else self.df[[c for c in columns if c in self.df.columns]]
+        return df.iloc[pos[pos >= 0]]
+
+    def range_positions(self, col, lower=-np.inf, upper=np.inf, **kw):
+        """Row positions with lower <= col <= upper (see SortedColumnIndex.between)."""
+        return self.ranges[col].between(lower, upper, **kw)
+
+    def state_slice(self, state):
+        """Row range holding state's institutions (empty for unknown states)."""
+        return self.state_slices.get(state, slice(0, 0))
+
+    def state_predicate(self, state, in_out_pref):
+        """Predicate for the in/out-of-state choice, None for "I don't care"."""
+        sl = self.state_slice(state)
+        if in_out_pref == "In-State":
+            return Predicate("state", sl.stop - sl.start, lambda: slice_mask(len(self), sl))
+        if in_out_pref == "Out-of-State":
+            return Predicate("state", len(self) - (sl.stop - sl.start), lambda: ~slice_mask(len(self), sl))
+        return None
+
+    def range_predicate(self, name, col, lower=-np.inf, upper=np.inf, **kw):
+        """Predicate for lower <= col <= upper; the estimate is exact (two searchsorted calls)."""
+        index = self.ranges[col]
+        return Predicate(name, index.count(lower, upper, **kw),
+                         lambda: positions_mask(len(self), index.between(lower, upper, **kw)))
+
+    def row(self, unit_id):
+        """The row for a single Unit ID, or None."""
+        try:
+            return self.df.loc[unit_id]
+        except KeyError:
+            return None
@@ -0,0 +1,149 @@
+# notebook lookup helpers (copied from notebook)
+#
+# every helper takes the loaded data first - an Engine, or anything with affordability_df,
+# affordability_names (NameIndex) and affordability_metrics (MetricTable) - e.g.
+# grad_rate_years(engine, "Valley", 4).
+import numpy as np
+import pandas as pd
+
+from .metrics import resolve_metric, MSI_Type, percent_and_race
+
+
+def search_msi(data, name):
+  if name not in MSI_Type:
+    print(f"Invalid MSI type: {name}. Available types are: {', '.join(MSI_Type.keys())}")
+    return pd.DataFrame() # Return an empty DataFrame for invalid input
+  column_name = MSI_Type[name]
+  filtered_colleges = data.affordability_df[data.affordability_df[column_name] == 1]
+  return filtered_colleges['Unit ID']
+
+def is_msi(data, institution):
+    matches = data.affordability_names.mask(institution)
+    if matches.sum() >= 1:
+        sub = data.affordability_df[matches].copy()
+    else:
+        print(f"Invalid Institution: {institution}.")
+        return pd.DataFrame()
+    msi_columns = list(MSI_Type.values())
+    sub['Minority Serving Institution'] = (sub[msi_columns] == 1).any(axis=1)
+    df = pd.DataFrame({
+      "Institution Name": sub["Institution Name"],
+      "Minority Serving Institution": sub['Minority Serving Institution']
+    })
+    return df
+
+def lookup_metrics(data, institution, columns):
+  # shared by the helpers below: name-index match + one take of the wanted columns
+  df = data.affordability_metrics.query([institution], columns).drop(columns="Query")
+  if df.empty:
+    print(f"Invalid Institution: {institution}.")
+    return pd.DataFrame()
+  return df
+
+def compare_institutions(data, institutions, metrics):
+  # e.g. compare_institutions(engine, ["Valley", "Lake State"], [("grad_rate", 4), ("median_debt", "Dependent")])
+  return data.affordability_metrics.query(institutions, metrics)
+
+def search_percent_by_race_ethnicity(data, institution, string):
+  column_name = resolve_metric("percent_by_race", string)
+  if column_name is None:
+        print(f"Invalid Race or Ethnicity: {string}. Available Race and Ethnicity options are: {', '.join(percent_and_race.keys())}")
+        return pd.DataFrame()
+  # race specific graduation rate if there is one, else the total 6-year rate
+  grad_column_name = resolve_metric("grad_rate_by_race", string)
+  df = lookup_metrics(data, institution, [column_name, ("grad_rate", 4), ("grad_rate", 5), ("grad_rate", 6)])
+  if not df.empty:
+    df[f"Graduation Rate ({string} Specific)"] = data.affordability_df.loc[df.index, grad_column_name]
+  return df
+
+def grad_rate_years(data, institution, num):
+    column_name = resolve_metric("grad_rate", num)
+    if column_name is None:
+        print(f"No general graduation rate column contains {num} years.")
+        return pd.DataFrame()
+    return lookup_metrics(data, institution, [column_name])
+
+def percent_nonresident(data, institution):
+  return lookup_metrics(data, institution, [("nonresident",)])
+
+def percent_bachelors_by_race_ethnicity(data, institution, race, gender="Total"):
+    column_name = resolve_metric("bachelors_by_race", race, gender)
+    if column_name is None:
+        print(f"Invalid Race or Gender combination: {race} {gender}")
+        return pd.DataFrame()
+    return lookup_metrics(data, institution, [column_name])
+
+def percent_of_bachelors_by_field(data, institution, field):
+    column_name = resolve_metric("bachelors_by_field", field)
+    if column_name is None:
+        print(f"Invalid Field: {field}")
+        return pd.DataFrame()
+    return lookup_metrics(data, institution, [column_name])
+
+def median_debt(data, institution, dependence):
+    column_name = resolve_metric("median_debt", dependence)
+    if column_name is None:
+        print(f"Invalid Field: {dependence}")
+        return pd.DataFrame()
+    return lookup_metrics(data, institution, [column_name])
+
+def tuition_by_state_status(data, institution, status="Out"):
+    column_name = resolve_metric("tuition", status)
+    if column_name is None:
+        print(f"Invalid Field: {status}")
+        return pd.DataFrame()
+    return lookup_metrics(data, institution, [column_name])
+
+def affordability_gap_df(data, institution):
+  matches = data.affordability_names.mask(institution)
+  if matches.sum() >= 1:
+    sub = data.affordability_df[matches]
+  else:
+    print(f"Invalid Institution: {institution}.")
+    return pd.DataFrame()
+  df = pd.DataFrame({
+        "Institution Name": sub["Institution Name"],
+        "Affordability Gap (net price minus income earned working 10 hrs at min wage)": sub["Affordability Gap (net price minus income earned working 10 hrs at min wage)"],
+        "Weekly Hours to Close Gap": sub["Weekly Hours to Close Gap"],
+        "Income Earned from Working 10 Hours a Week at State's Minimum Wage": sub["Income Earned from Working 10 Hours a Week at State's Minimum Wage"],
+    })
+  return df
+
+def school_size(data, institution):
+  matches = data.affordability_names.mask(institution)
+  if matches.sum() >= 1:
+    sub = data.affordability_df[matches].copy()
+  else:
+    print(f"Invalid Institution: {institution}.")
+    return pd.DataFrame()
+
+  def classify_size(num_undergrads):
+    if pd.isna(num_undergrads):
+        return np.nan
+    if num_undergrads <= 5000:
+      return 'Small'
+    elif num_undergrads <= 15000:
+      return 'Medium'
+    else:
+      return "Large"
+
+  sub["Size"] = sub["Number of Undergraduates Enrolled"].apply(classify_size)
+
+  df = pd.DataFrame({
+        "Institution Name": sub["Institution Name"],
+        "Size": sub["Size"]
+    })
+  return df
+
+def priv_or_pub(data, institution):
+    matches = data.affordability_names.mask(institution)
+    if matches.sum() >= 1:
+        sub = data.affordability_df[matches]
+    else:
+        print(f"Invalid Institution: {institution}.")
+        return pd.DataFrame()
+    df = pd.DataFrame({
+        "Institution Name": sub["Institution Name"],
+        'Sector': sub['Sector Name']
+    })
+    return df
@@ -0,0 +1,161 @@
+# metric registry for the notebook lookup helpers
+#
+# the column lists below are the notebook's. resolve_metric() turns a (family, *key) spec
+# such as ("grad_rate", 4) or ("bachelors_by_race", "Asian", "Women") into a column name
+# once (memoized), and MetricTable.query() pulls many institutions x many metrics out of
+# a frame in a single positional take instead of one name scan per helper call.
+from functools import lru_cache
+
+import numpy as np
+
+# Global variables (copied from notebook)
+MSI_Type = {
+    'HBCU': 'Historically Black College or University (HBCU)',
+    'AANAPISI': 'Asian American or Native American Pacific Islander-Serving Institution (AANAPISI)',
+    'ANNHSI': 'Alaska-Native, Native Hawaiian-Serving Institution (ANNHSI)',
+    'HSI': 'Hispanic-serving Institution (HSI)',
+    'NANTI': 'Native American Non-Tribal Institution (NANTI)',
+    'PBI': 'Predominantly Black Institution (PBI)',
+    'TCU': 'Tribal College or University (TCU)'
+}
+
+Race_Ethnicity_Keywords = ['American Indian', 'Alaska Native', 'Two or More Races', 'Asian', 'Black', 'African American', 'Latino',
+                'Native Hawaiian', 'Other Pacific Islander', 'White', 'Race-Ethnicity Unknown']
+
+percent_and_race = {"American Indian": "Percent of American Indian or Alaska Native Undergraduates",
+                    "Alaska Native:": "Percent of American Indian or Alaska Native Undergraduates",
+                    "Two or More Races": "Percent of Two or More Races Undergraduates",
+                    "Asian": "Percent of Asian Undergraduates",
+                    "Black": "Percent of Black or African American Undergraduates",
+                    "African American": "Percent of Black or African American Undergraduates",
+                    "Latino": "Percent of Latino Undergraduates",
+                    "Native Hawaiian": "Percent of Native Hawaiian or Other Pacific Islander Undergraduates",
+                    "Other Pacific Islander": "Percent of Native Hawaiian or Other Pacific Islander Undergraduates",
+                    "White": "Percent of White Undergraduates",
+                    "Race-Ethnicity Unknown": "Percent of Race-Ethnicity Unknown Undergraduates"
+}
+
+degree_years = [
+    "Bachelor's Degree Graduation Rate Within 4 Years - Total",
+    "Bachelor's Degree Graduation Rate Within 5 Years - Total",
+    "Bachelor's Degree Graduation Rate Within 6 Years - American Indian or Alaska Native",
+    "Bachelor's Degree Graduation Rate Within 6 Years - Asian, Native Hawaiian, Pacific Islander",
+    "Bachelor's Degree Graduation Rate Within 6 Years - Asian",
+    "Bachelor's Degree Graduation Rate Within 6 Years - Black, Non-Latino",
+    "Bachelor's Degree Graduation Rate Within 6 Years - Latino",
+    "Bachelor's Degree Graduation Rate Within 6 Years - Men",
+    "Bachelor's Degree Graduation Rate Within 6 Years - Native Hawaiian or Other Pacific Islander",
+    "Bachelor's Degree Graduation Rate Bachelor Degree Within 6 Years - Total",
+    "Bachelor's Degree Graduation Rate Bachelor Degree Within 6 Years - Women",
+    "Bachelor's Degree Graduation Rate Within 6 Years - White Non-Latino"
+]
+
+percent_bachelors_by_race = [
+    "Percent of Bachelor Degrees American Indian or Alaska Native Men",
+    "Percent of Bachelor Degrees American Indian or Alaska Native Total",
+    "Percent of Bachelor Degrees American Indian or Alaska Native Women",
+    "Percent of Bachelor Degrees Asian Men",
+    "Percent of Bachelor Degrees Asian Total",
+    "Percent of Bachelor Degrees Asian Women",
+    "Percent of Bachelor Degrees Black or African American Men",
+    "Percent of Bachelor Degrees Black or African American Total",
+    "Percent of Bachelor Degrees Black or African American Women",
+    "Percent of Bachelor Degrees Latino Men",
+    "Percent of Bachelor Degrees Latino Total",
+    "Percent of Bachelor Degrees Latina Women",
+    "Percent of Bachelor Degrees Native Hawaiian or Other Pacific Islander Men",
+    "Percent of Bachelor Degrees Native Hawaiian or Other Pacific Islander Total",
+    "Percent of Bachelor Degrees Native Hawaiian or Other Pacific Islander Women",
+    "Percent of Bachelor Degrees Women",
+    "Percent of Bachelor Degrees Men",
+    "Percent of Bachelor Degrees White Total",
+    "Percent of Bachelor Degrees White Men",
+    "Percent of Bachelor Degrees White Women"
+]
+
+percent_bachelors_by_field = [
+    "Percent of Bachelor Degrees Awarded in Science, Technology, Engineering, and Math",
+    "Percent of Bachelor Degrees Awarded in Arts and Humanities",
+    "Percent of Bachelor Degrees Awarded in Education",
+    "Percent of Bachelor Degrees Awarded in Social Sciences",
+    "Percent of Bachelor Degrees Awarded in Health Sciences",
+    "Percent of Bachelor Degrees Awarded in Business"
+]
+
+dependent_independent = ["Median Debt for Dependent Students", "Median Debt for Independent Students"]
+
+instate_outstate = ["Average In-State Tuition for First-Time, Full-Time Undergraduates",
+                    "Out-of-State Average Tuition for First-Time, Full-Time Undergraduates"]
+
+NAME_COL = "Institution Name"
+SIX_YEAR_TOTAL = "Bachelor's Degree Graduation Rate Bachelor Degree Within 6 Years - Total"
+
+
+def _first(columns, match):
+    return next((col for col in columns if match(col)), None)
+
+
+def _grad_rate_by_race(race):
+    # race specific 6 year rate if there is one, else the overall 6 year rate
+    col = _first(degree_years, lambda c: race.lower() in c.lower() and '6 years - total' not in c.lower())
+    return col or SIX_YEAR_TOTAL
+
+
+# family -> resolver(*key) returning a column name or None
+METRIC_FAMILIES = {
+    "grad_rate": lambda years: _first(degree_years, lambda c: str(years) in c and "Total" in c),
+    "grad_rate_by_race": _grad_rate_by_race,
+    "percent_by_race": lambda race: percent_and_race.get(race),
+    "nonresident": lambda: "Percent of Nonresident Undergraduates",
+    "bachelors_by_race": lambda race, gender="Total": _first(
+        percent_bachelors_by_race, lambda c: race.lower() in c.lower() and gender.lower() in c.lower()),
+    "bachelors_by_field": lambda field: _first(percent_bachelors_by_field, lambda c: field.lower() in c.lower()),
+    "median_debt": lambda dependence: _first(dependent_independent, lambda c: dependence.lower() in c.lower()),
+    "tuition": lambda status="Out": _first(instate_outstate, lambda c: status.lower() in c.lower()),
+}
+
+
+@lru_cache(maxsize=None)
+def resolve_metric(family, *key):
+    """Column name for a metric spec, or None if the family/key doesn't match any column."""
+    resolver = METRIC_FAMILIES.get(family)
+    if resolver is None:
+        return None
+    try:
+        return resolver(*key)
+    except TypeError:  # wrong number of key parts
+        return None
+
+
+class MetricTable:
+    def __init__(self, df, names):
+        # names: NameIndex built over df[NAME_COL], row positions line up with df
+        self.df = df
+        self.names = names
+        self.col_pos = {col: i for i, col in enumerate(df.columns)}
+
+    def column(self, metric):
+        """Column name for a metric spec tuple, or a plain column name passed through."""
+        col = metric if isinstance(metric, str) else resolve_metric(*metric)
+        return col if col in self.col_pos else None
+
+    def query(self, institutions, metrics):
+        """One row per institution matching each name query, one column per metric.
+
+        Unknown metrics are reported and skipped. The Query column says which name
+        query each row matched.
+        """
+        if isinstance(institutions, str):
+            institutions = [institutions]
+        columns = []
+        for metric in metrics:
+            col = self.column(metric)
+            if col is None:
+                print(f"Invalid metric: {metric}")
+            elif col != NAME_COL and col not in columns:
+                columns.append(col)
+        matches = [self.names.positions(q) for q in institutions]
+        rows = np.concatenate(matches) if matches else np.array([], dtype=np.int64)
+        out = self.df.iloc[rows, [self.col_pos[NAME_COL]] + [self.col_pos[c] for c in columns]]
+        out.insert(0, "Query", np.repeat(np.asarray(institutions, dtype=object), [len(m) for m in matches]))
+        return out
@@ -0,0 +1,74 @@
+# trigram index over institution names for the notebook lookup helpers
+#
+# names are lower-cased once and every 3-character window gets a posting list of row
+# positions. a substring query intersects the posting lists of its own trigrams and only
+# checks the handful of surviving candidates with a plain `in`, instead of running a
+# case-insensitive regex over every name. queries shorter than 3 characters fall back to
+# scanning the lower-cased names. missing names never match. patched() renames a few rows
+# by touching only the posting lists of trigrams that changed.
+from collections import defaultdict
+
+import numpy as np
+
+
+def trigrams(text):
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class NameIndex:
+    def __init__(self, names):
+        self.names = [name.lower() if isinstance(name, str) else None for name in names]
+        postings = defaultdict(list)
+        for pos, name in enumerate(self.names):
+            for gram in trigrams(name or ""):
+                postings[gram].append(pos)
+        self.postings = {gram: np.array(p, dtype=np.int64) for gram, p in postings.items()}
+
+    def __len__(self):
+        return len(self.names)
+
+    def positions(self, query):
+        """Sorted row positions whose name contains query (case-insensitive substring)."""
+        q = str(query).lower()
+        if len(q) < 3:
+            return np.array([pos for pos, name in enumerate(self.names) if name is not None and q in name],
+                            dtype=np.int64)
+        lists = []
+        for gram in trigrams(q):
+            p = self.postings.get(gram)
+            if p is None:
+                return np.array([], dtype=np.int64)
+            lists.append(p)
+        lists.sort(key=len)
+        candidates = lists[0]
+        for p in lists[1:]:
+            candidates = np.intersect1d(candidates, p, assume_unique=True)
+            if len(candidates) == 0:
+                break
+        return np.array([pos for pos in candidates if q in self.names[pos]], dtype=np.int64)
+
+    def mask(self, query):
+        """Boolean row mask for query, usable as df[mask] on the frame the index was built from."""
+        mask = np.zeros(len(self.names), dtype=bool)
+        mask[self.positions(query)] = True
+        return mask
+
+    def patched(self, positions, names):
+        """Copy with the names at positions replaced; only changed trigrams' postings are rebuilt."""
+        out = NameIndex([])
+        out.names = list(self.names)
+        out.postings = dict(self.postings)
+        for pos, name in zip(positions, names):
+            old = out.names[pos]
+            new = name.lower() if isinstance(name, str) else None
+            old_grams, new_grams = trigrams(old or ""), trigrams(new or "")
+            for gram in old_grams - new_grams:
+                p = out.postings[gram][out.postings[gram] != pos]
+                if len(p):
+                    out.postings[gram] = p
+                else:
+                    del out.postings[gram]
+            for gram in new_grams - old_grams:
+                out.postings[gram] = np.union1d(out.postings.get(gram, np.array([], dtype=np.int64)), [pos])
+            out.names[pos] = new
+        return out
@@ -0,0 +1,49 @@
+# incremental recommendation runs
+#
+# remembers the last query key and weights so a rerun only redoes what its inputs
+# invalidate: a new query key or a weights change fetches the candidates and re-scores +
+# re-ranks, an unchanged rerun reuses the last result. whether filter -> merge -> normalize
+# ran is select()'s answer (a query cache miss), not a guess from the keys: a new query
+# another session already ran is a hit, a weights-only change after an eviction is a miss.
+# the ranker keeps nothing but the keys and whatever rank() returned - the candidates live
+# in the engine's query cache, not in every session.
+SELECT_STAGES = ("filter", "merge", "normalize")
+RANK_STAGES = ("score", "rank")
+
+
+def weights_key(weights):
+    return tuple(sorted(weights.items()))
+
+
+class IncrementalRanker:
+    def __init__(self):
+        self.query_key = None
+        self.weights_key = None
+        self.result = None
+        self.stages_run = ()
+        self.stages_skipped = ()
+
+    def run(self, query_key, weights, select, rank):
+        """select(query_key) -> (candidates, cache hit), rank(candidates, weights) -> result."""
+        run, skipped = [], []
+        wkey = weights_key(weights)
+        new_query = self.result is None or query_key != self.query_key
+        if new_query or wkey != self.weights_key:
+            candidates, hit = select(query_key)
+            (skipped if hit else run).extend(SELECT_STAGES)
+            self.result = rank(candidates, weights)
+            self.query_key, self.weights_key = query_key, wkey
+            run += RANK_STAGES
+        else:
+            skipped += SELECT_STAGES + RANK_STAGES
+        self.stages_run, self.stages_skipped = tuple(run), tuple(skipped)
+        return self.result
+
+    def rerank(self, weights, select, rank):
+        """Re-score the last query with new weights (None if nothing ran yet)."""
+        if self.query_key is None:
+            return None
+        return self.run(self.query_key, weights, select, rank)
+
+    def describe(self):
+        return f"ran: {', '.join(self.stages_run) or 'nothing'}; skipped: {', '.join(self.stages_skipped) or 'nothing'}"
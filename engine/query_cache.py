@@ -0,0 +1,153 @@
+# process-wide LRU + TTL cache for filter/merge results, shared by every streamlit session
+#
+# keys are the normalized sidebar query (see normalize_query). the cache is bound to the
+# dataset it was filled from: binding it to a different InstitutionTable (i.e. the data
+# was reloaded) drops every entry; derive() carries entries over to a patched dataset
+# minus the ones a delta invalidated. concurrent misses on the same key are coalesced: one
+# caller computes, the others wait for its result.
+import threading
+import time
+from collections import OrderedDict
+
+_MISSING = object()
+
+
+def _bounds(value_range):
+    # thousands of $, kept to the whole dollar: 20 and 20.0 share a key, 75.9 stays 75.9
+    return tuple(round(float(v) * 1000) / 1000 for v in value_range)
+
+
+def normalize_query(state, in_out_pref, tuition_range, debt_range, msi_required, student_body_size):
+    """Hashable key for one filter query; equivalent sidebar inputs map to the same key."""
+    return (state, in_out_pref, _bounds(tuition_range), _bounds(debt_range),
+            bool(msi_required), student_body_size)
+
+
+class SingleFlight:
+    """Runs fn once per key at a time; callers arriving while it runs get the same result."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}  # key -> [done event, value, error]
+        self.coalesced = 0
+
+    def do(self, key, fn):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = [threading.Event(), None, None]
+            else:
+                self.coalesced += 1
+        if not leader:
+            call[0].wait()
+            if call[2] is not None:
+                raise call[2]
+            return call[1]
+        try:
+            call[1] = fn()
+            return call[1]
+        except BaseException as e:
+            call[2] = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call[0].set()
+
+    def in_flight(self):
+        return len(self._calls)
+
+
+class QueryCache:
+    def __init__(self, maxsize=256, ttl=3600, clock=time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl  # seconds, None = never expire
+        self.clock = clock
+        self._entries = OrderedDict()  # key -> (stored_at, value)
+        self._lock = threading.Lock()
+        self._source = None
+        self._flight = SingleFlight()
+        self.hits = self.misses = self.evictions = self.expirations = self.invalidations = 0
+
+    def bind(self, source):
+        """Tie the cache to a dataset object; a different object than last time clears it."""
+        with self._lock:
+            if self._source is not source:
+                if self._source is not None:
+                    self.invalidations += 1
+                self._entries.clear()
+                self._source = source
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._entries.get(key, _MISSING)
+            if entry is not _MISSING and self.ttl is not None and self.clock() - entry[0] > self.ttl:
+                del self._entries[key]
+                self.expirations += 1
+                entry = _MISSING
+            if entry is _MISSING:
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = (self.clock(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def get_or_compute(self, key, compute):
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            value = self._flight.do(key, lambda: self._compute_and_put(key, compute))
+        return value
+
+    def _compute_and_put(self, key, compute):
+        # a caller that missed just before the previous leader finished may land here too late
+        # to coalesce; the entry is in by then, so don't compute it twice
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is not None and (self.ttl is None or self.clock() - entry[0] <= self.ttl):
+            return entry[1]
+        value = compute()
+        self.put(key, value)
+        return value
+
+    def items(self):
+        """(key, value) pairs currently held, oldest first (expired entries included)."""
+        with self._lock:
+            return [(k, v) for k, (_, v) in self._entries.items()]
+
+    def derive(self, source, drop=()):
+        """New cache bound to source holding this one's entries except the keys in drop."""
+        drop = set(drop)
+        out = QueryCache(self.maxsize, self.ttl, self.clock)
+        with self._lock:
+            out._entries = OrderedDict((k, e) for k, e in self._entries.items() if k not in drop)
+            out.hits, out.misses, out.evictions = self.hits, self.misses, self.evictions
+            out.expirations = self.expirations
+            out.invalidations = self.invalidations + (len(self._entries) - len(out._entries))
+        out._source = source
+        return out
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self):
+        return {"size": len(self._entries), "maxsize": self.maxsize, "hits": self.hits,
+                "misses": self.misses, "coalesced": self._flight.coalesced, "evictions": self.evictions,
+                "expirations": self.expirations, "invalidations": self.invalidations}
+
+    def format_stats(self):
+        s = self.stats()
+        return (f"query cache: {s['size']}/{s['maxsize']} entries, {s['hits']} hits, {s['misses']} misses, "
+                f"{s['coalesced']} coalesced, {s['evictions']} evicted, {s['expirations']} expired, {s['invalidations']} reloads")
@@ -0,0 +1,47 @@
+# sorted-array index for the slider range filters
+#
+# each indexed column keeps its non-null values sorted once at load; a range query is then
+# two searchsorted calls returning row positions instead of two full-column comparisons.
+# patched() moves a few rows to their new values with searchsorted + insert, no re-sort.
+import numpy as np
+
+
+class SortedColumnIndex:
+    def __init__(self, values):
+        values = np.asarray(values, dtype=float)
+        valid = np.flatnonzero(~np.isnan(values))
+        order = np.argsort(values[valid], kind="stable")
+        self.positions = valid[order]
+        self.values = values[self.positions]
+        self.size = len(values)
+
+    def bounds(self, lower=-np.inf, upper=np.inf, left_open=False, right_open=False):
+        """Slice [start, stop) of the sorted arrays covering lower..upper."""
+        start = np.searchsorted(self.values, lower, side="right" if left_open else "left")
+        stop = np.searchsorted(self.values, upper, side="left" if right_open else "right")
+        return start, max(start, stop)
+
+    def between(self, lower=-np.inf, upper=np.inf, left_open=False, right_open=False):
+        """Row positions whose value is within lower..upper (inclusive unless *_open), NaNs never match."""
+        start, stop = self.bounds(lower, upper, left_open, right_open)
+        return self.positions[start:stop]
+
+    def count(self, lower=-np.inf, upper=np.inf, left_open=False, right_open=False):
+        start, stop = self.bounds(lower, upper, left_open, right_open)
+        return int(stop - start)
+
+    def patched(self, positions, values):
+        """Copy with the rows at positions re-indexed under new values (NaN drops them)."""
+        positions = np.asarray(positions, dtype=np.int64)
+        values = np.asarray(values, dtype=float)
+        keep = ~np.isin(self.positions, positions)
+        pos, vals = self.positions[keep], self.values[keep]
+        valid = ~np.isnan(values)
+        order = np.argsort(values[valid], kind="stable")
+        new_pos, new_vals = positions[valid][order], values[valid][order]
+        at = np.searchsorted(vals, new_vals, side="right")
+        out = SortedColumnIndex.__new__(SortedColumnIndex)
+        out.positions = np.insert(pos, at, new_pos)
+        out.values = np.insert(vals, at, new_vals)
+        out.size = self.size
+        return out
@@ -0,0 +1,115 @@
+# matrix scoring + top-k selection for score_and_rank_schools
+#
+# the weighted columns are pulled into one contiguous float matrix and scored with a single
+# matrix-vector product. "lower is better" columns are folded into the weights:
+# w * (1 - x) == w - w * x, so they get weight -w and w goes into a constant offset.
+# ranking only partitions out the top k (argpartition) and dedupes names among those
+# candidates; the full sort only happens when the whole ranking is asked for.
+# fit_minmax/apply_minmax are the numpy min-max normalization used for the dataset-wide fit.
+# ScoringCandidates keeps the prepared matrix for a filtered set, so changing only the
+# importance weights re-scores without rebuilding anything, and score_many scores a whole
+# batch of weightings against it in one matrix-matrix product.
+import numpy as np
+import pandas as pd
+
+
+def fit_minmax(X):
+    """Per-column (min, max) of a 2-D float array; empty input gives zeros."""
+    if X.shape[0] == 0:
+        return np.zeros(X.shape[1]), np.zeros(X.shape[1])
+    return X.min(axis=0), X.max(axis=0)
+
+
+def apply_minmax(X, lo, hi):
+    """Scale X to [0, 1] with the given bounds; constant columns map to 0 (as MinMaxScaler does)."""
+    span = hi - lo
+    span = np.where(span == 0, 1.0, span)
+    return np.ascontiguousarray((X - lo) / span)
+
+
+def weight_vector(columns, user_weights, column_directions):
+    """(weights, offset) such that X @ weights + offset is the direction-adjusted score."""
+    w = np.array([float(user_weights.get(c, 0)) for c in columns], dtype=float)
+    lower = np.array([column_directions.get(c) == "lower" for c in columns], dtype=bool)
+    offset = float(w[lower].sum())
+    w[lower] *= -1
+    return w, offset
+
+
+def score_matrix(X, weights, offset=0.0):
+    return X @ weights + offset
+
+
+def _first_per_group(ordered, groups):
+    # keep the first (best) position of each group, preserving order
+    _, first = np.unique(groups[ordered], return_index=True)
+    return ordered[np.sort(first)]
+
+
+def _ordered(scores, positions):
+    # by score descending, ties by table position
+    return positions[np.lexsort((positions, -scores[positions]))]
+
+
+def rank_positions(scores, groups, k=None):
+    """Row positions of the best-scoring row per group, best first; only the top k if k is given.
+
+    groups is an int array (e.g. factorized institution names) - rows sharing a group are
+    duplicates and only the highest scoring one is kept.
+    """
+    n = len(scores)
+    if k is None or k >= n:
+        ranked = _first_per_group(_ordered(scores, np.arange(n)), groups)
+        return ranked if k is None else ranked[:k]
+    kk = max(k, 1)
+    while True:
+        idx = np.argpartition(-scores, kk - 1)[:kk]
+        # everything tied with the k-th score is a candidate too, so ties resolve like a full sort
+        candidates = np.flatnonzero(scores >= scores[idx].min())
+        ranked = _first_per_group(_ordered(scores, candidates), groups)
+        if len(ranked) >= k or kk >= n:
+            return ranked[:k]
+        # duplicates ate into the top k, widen the window
+        kk = min(n, kk * 2)
+
+
+class ScoringCandidates:
+    """A filtered/merged frame prepared for scoring: numeric feature matrix + name groups."""
+
+    def __init__(self, frame, columns, features, groups):
+        self.frame = frame
+        self.columns = columns
+        self.features = features
+        self.groups = groups
+
+    @classmethod
+    def from_frame(cls, df, exclude=(), group_col="Institution Name"):
+        # bool flags (MSI Status) score as 0/1
+        columns = [c for c in df.select_dtypes(include=["number", "bool"]).columns if c not in exclude]
+        features = np.ascontiguousarray(df[columns].fillna(0).to_numpy(dtype=float))
+        groups = pd.factorize(df[group_col], use_na_sentinel=False)[0]
+        return cls(df, columns, features, groups)
+
+    def __len__(self):
+        return len(self.frame)
+
+    def scores(self, user_weights, column_directions):
+        weights, offset = weight_vector(self.columns, user_weights, column_directions)
+        return score_matrix(self.features, weights, offset)
+
+    def score_many(self, weight_sets, column_directions):
+        """(rows, len(weight_sets)) scores: every weighting at once with one matrix-matrix product."""
+        vectors = [weight_vector(self.columns, w, column_directions) for w in weight_sets]
+        W = np.column_stack([w for w, _ in vectors]) if vectors else np.zeros((len(self.columns), 0))
+        offsets = np.array([o for _, o in vectors], dtype=float)
+        return self.features @ W + offsets
+
+    def rank(self, user_weights, column_directions, top_k=None):
+        """Frame rows best first (one per name) with a score column; top_k=None ranks everything."""
+        if len(self.frame) == 0:
+            return self.frame
+        scores = self.scores(user_weights, column_directions)
+        order = rank_positions(scores, self.groups, top_k)
+        df = self.frame.iloc[order].reset_index(drop=True)
+        df["score"] = scores[order]
+        return df
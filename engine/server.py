@@ -0,0 +1,190 @@
+# local JSON recommendation service over the engine (stdlib only)
+#
+#   python -m engine.server --port 8000
+#   curl -s localhost:8000/recommend -d '{"state": "CA", "in_out_pref": "In-State"}'
+#
+# the data lives in a SnapshotStore shared read-only by every request thread; each request
+# pins the active snapshot once, so POST /refresh (or --watch) can swap in a new release and
+# POST /delta (a CSV of corrected rows keyed by Unit ID) a patched one without dropping
+# requests. identical requests that arrive while the first one is still running wait for
+# its answer instead of recomputing it; different weights over the same filters still
+# share the cached selection.
+#
+# with --trace, per-stage latency histograms (engine.tracing) are served on GET /metrics as
+# text, or JSON with ?format=json.
+import argparse
+import io
+import json
+import threading
+import traceback
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs
+
+import pandas as pd
+
+from .core import Profile, TOP_N, AFFORDABILITY_CSV, COLLEGE_CSV
+from .query_cache import SingleFlight
+from .snapshots import SnapshotStore
+from .tracing import tracer
+
+MAX_BODY = 64 * 1024
+
+
+def parse_request(payload, states=None):
+    """JSON object (or flattened query string) -> (Profile, top_k). Raises ValueError."""
+    profile = Profile.from_dict(payload, states)
+    try:
+        top_k = int(payload.get("top_k", TOP_N))
+    except (TypeError, ValueError):
+        raise ValueError("top_k must be an integer")
+    if top_k < 1:
+        raise ValueError("top_k must be at least 1")
+    return profile, top_k
+
+
+def recommendation_json(recommendation):
+    ranked = recommendation.ranked
+    names = ranked["Institution Name"].tolist() if not ranked.empty else []
+    return {
+        "warning": recommendation.warning,
+        "matched": int(len(recommendation.selection.found_ids)),
+        "results": [{"unit_id": int(i), "name": n, "score": float(s)}
+                    for i, n, s in zip(recommendation.unit_ids, names, recommendation.scores)],
+    }
+
+
+class RecommendationServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, store, quiet=True):
+        super().__init__(address, RecommendationHandler)
+        self.store = store
+        self.quiet = quiet
+        self.inflight = SingleFlight()
+        self._count_lock = threading.Lock()
+        self.requests_served = 0
+
+    def recommend(self, profile, top_k):
+        engine = self.store.current()
+
+        def compute():
+            body = recommendation_json(engine.recommend(profile, top_k))
+            body["version"] = engine.version
+            return body
+        # the profile is frozen/hashable, so it doubles as the coalescing key
+        with tracer.span("request") as span:
+            body = self.inflight.do((engine.version, profile, top_k), compute)
+            span.rows = body["matched"]
+        with self._count_lock:
+            self.requests_served += 1
+        return body
+
+    def stats(self):
+        return {"requests": self.requests_served, "coalesced": self.inflight.coalesced,
+                "in_flight": self.inflight.in_flight(), "snapshot": self.store.describe(),
+                "query_cache": self.store.current().query_cache.stats()}
+
+
+class RecommendationHandler(BaseHTTPRequestHandler):
+    server_version = "CollegeRecommender/1"
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        if url.path == "/health":
+            return self._send(200, {"status": "ok"})
+        if url.path == "/stats":
+            return self._send(200, self.server.stats())
+        if url.path == "/recommend":
+            return self._recommend({k: v[-1] for k, v in parse_qs(url.query).items()})
+        if url.path == "/metrics":
+            if parse_qs(url.query).get("format") == ["json"]:
+                return self._send(200, {"enabled": tracer.enabled, "stages": tracer.snapshot()})
+            return self._send_text(200, tracer.format_text() + "\n")
+        self._send(404, {"error": f"no such endpoint: {url.path}"})
+
+    def do_POST(self):
+        path = urlsplit(self.path).path
+        if path == "/refresh":
+            self.server.store.refresh_async()
+            return self._send(202, {"version": self.server.store.version, "refreshing": True})
+        if path not in ("/recommend", "/delta"):
+            return self._send(404, {"error": f"no such endpoint: {self.path}"})
+        length = int(self.headers.get("Content-Length") or 0)
+        if length > MAX_BODY:
+            return self._send(413, {"error": "request body too large"})
+        body = self.rfile.read(length)
+        if path == "/delta":
+            # CSV of changed rows keyed by Unit ID
+            try:
+                return self._send(200, self.server.store.apply_delta(io.BytesIO(body)))
+            except (ValueError, pd.errors.ParserError, pd.errors.EmptyDataError) as e:
+                return self._send(400, {"error": str(e)})
+        try:
+            payload = json.loads(body or b"{}")
+        except ValueError:
+            return self._send(400, {"error": "request body is not valid JSON"})
+        self._recommend(payload)
+
+    def _recommend(self, payload):
+        try:
+            profile, top_k = parse_request(payload, self.server.store.current().institutions.states)
+        except ValueError as e:
+            return self._send(400, {"error": str(e)})
+        try:
+            body = self.server.recommend(profile, top_k)
+        except Exception as e:
+            # answer instead of dropping the connection; the traceback goes to stderr even when quiet
+            traceback.print_exc()
+            return self._send(500, {"error": f"internal error: {type(e).__name__}"})
+        self._send(200, body)
+
+    def _send(self, status, body):
+        self._send_text(status, json.dumps(body), "application/json")
+
+    def _send_text(self, status, text, content_type="text/plain; charset=utf-8"):
+        data = text.encode()
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        if not self.server.quiet:
+            super().log_message(format, *args)
+
+
+def serve(data, host="127.0.0.1", port=8000, quiet=True):
+    """Bound (not yet running) server over a SnapshotStore or a fixed Engine.
+
+    port=0 picks a free port, see server.server_address.
+    """
+    store = data if isinstance(data, SnapshotStore) else SnapshotStore(loader=lambda: data)
+    return RecommendationServer((host, port), store, quiet)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="serve college recommendations as JSON")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--affordability", default=AFFORDABILITY_CSV)
+    parser.add_argument("--college", default=COLLEGE_CSV)
+    parser.add_argument("--watch", type=float, default=None,
+                        help="reload the data when the CSVs change, polling every N seconds")
+    parser.add_argument("--verbose", action="store_true", help="log every request")
+    parser.add_argument("--trace", action="store_true", help="collect per-stage latency histograms (GET /metrics)")
+    parser.add_argument("--trace-log", help="also append one JSON line per traced stage to this file")
+    args = parser.parse_args()
+    if args.trace or args.trace_log:
+        tracer.enable(args.trace_log)
+    store = SnapshotStore((args.affordability, args.college))
+    if args.watch:
+        store.watch(args.watch)
+    server = serve(store, args.host, args.port, quiet=not args.verbose)
+    print(f"serving on http://{server.server_address[0]}:{server.server_address[1]}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
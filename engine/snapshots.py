@@ -0,0 +1,131 @@
+# versioned, hot-swappable engine snapshots
+#
+# a SnapshotStore holds the active Engine (datasets + indexes + normalization + its query
+# cache) as one immutable snapshot. a refresh builds the next Engine completely in a
+# background thread and then swaps the reference under a lock, so:
+#   - callers grab store.current() once per request/rerun and keep using that snapshot; a
+#     swap mid-request doesn't change what they see, in-flight work finishes on the old one
+#   - nothing references a retired snapshot once its last request is done, so it is freed
+#     (store.describe() reports how many retired ones are still alive)
+#   - a failed refresh keeps serving the old snapshot and records the error
+#
+# watch() polls the source files and refreshes when they change on disk (e.g. after
+# python -m engine.ingest wrote a new release). apply_delta() swaps in a patched copy of the
+# active snapshot for small corrections, without reading the CSVs again.
+import os
+import threading
+import time
+import weakref
+
+from .core import Engine, AFFORDABILITY_CSV, COLLEGE_CSV
+from .delta import apply_delta
+
+
+def source_fingerprint(paths):
+    """(path, size, mtime_ns) per source file; None for files that are missing."""
+    out = []
+    for p in paths:
+        try:
+            st = os.stat(p)
+            out.append((p, st.st_size, st.st_mtime_ns))
+        except OSError:
+            out.append((p, None, None))
+    return tuple(out)
+
+
+class SnapshotStore:
+    def __init__(self, paths=(AFFORDABILITY_CSV, COLLEGE_CSV), loader=None, **engine_kw):
+        self.paths = tuple(paths)
+        self.loader = loader or (lambda: Engine.load(*self.paths, **engine_kw))
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._retired = weakref.WeakSet()
+        self._watcher = None
+        self.version = 0
+        self.loaded_at = None
+        self.fingerprint = None
+        self.last_error = None
+        self.refreshing = False
+        self._engine = None
+        self.refresh()
+
+    def current(self):
+        """The active Engine. Hold on to it for the whole request instead of calling again."""
+        return self._engine
+
+    def refresh(self):
+        """Build a new snapshot and swap it in; returns the new version (old one on failure)."""
+        with self._refresh_lock:  # one build at a time, a second caller waits and rebuilds
+            self.refreshing = True
+            fingerprint = source_fingerprint(self.paths)
+            try:
+                engine = self.loader()
+            except Exception as e:
+                if self._engine is None:
+                    raise
+                self.last_error = f"{type(e).__name__}: {e}"
+                return self.version
+            finally:
+                self.refreshing = False
+            self.fingerprint = fingerprint
+            return self._install(engine)
+
+    def apply_delta(self, delta):
+        """Swap in a copy of the active snapshot with delta applied (see engine.delta); returns the report."""
+        with self._refresh_lock:
+            engine, report = apply_delta(self._engine, delta)
+            report["version"] = self._install(engine)
+            return report
+
+    def _install(self, engine):
+        with self._lock:
+            old = self._engine
+            self.last_error = None
+            if engine is old:
+                # a loader that hands back the engine it was given (serve(engine)): nothing to swap
+                return self.version
+            engine.version = self.version + 1
+            self._engine = engine
+            self.version = engine.version
+            self.loaded_at = time.time()
+        if old is not None:
+            self._retired.add(old)
+        return self.version
+
+    def refresh_async(self):
+        """Start refresh() in a background thread and return the thread."""
+        t = threading.Thread(target=self.refresh, name="snapshot-refresh", daemon=True)
+        t.start()
+        return t
+
+    def stale(self):
+        return source_fingerprint(self.paths) != self.fingerprint
+
+    def watch(self, interval=60):
+        """Poll the source files every interval seconds and refresh when they change (idempotent)."""
+        if self._watcher is not None:
+            return self._watcher
+
+        def loop():
+            while True:
+                time.sleep(interval)
+                if self.stale() and not self.refreshing:
+                    self.refresh()
+        self._watcher = threading.Thread(target=loop, name="snapshot-watch", daemon=True)
+        self._watcher.start()
+        return self._watcher
+
+    def describe(self):
+        return {"version": self.version, "loaded_at": self.loaded_at,
+                "institutions": len(self._engine.institutions), "refreshing": self.refreshing,
+                "retired_alive": len(self._retired), "last_error": self.last_error,
+                "sources": [{"path": p, "size": size, "mtime_ns": mtime} for p, size, mtime in self.fingerprint]}
+
+    def format_version(self):
+        when = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(self.loaded_at))
+        text = f"data snapshot v{self.version}, loaded {when}"
+        if self._retired:
+            text += f", {len(self._retired)} older snapshot(s) still in use"
+        if self.last_error:
+            text += f" (last refresh failed: {self.last_error})"
+        return text
@@ -0,0 +1,107 @@
+# startup-time measurement for the app, meant to be tracked across releases
+#
+#   python -m engine.startup                 # table on stdout
+#   python -m engine.startup --json out.json --runs 5
+#
+# two numbers, each the median of fresh interpreter runs (nothing is warm in-process):
+#   imports       - `python -X importtime -c "import <module>"` for each module app.py pulls in
+#                   at startup, cumulative time per module plus the slowest imports overall
+#   first render  - wall time from launching a fresh interpreter to streamlit's AppTest having
+#                   run app.py once (what a new session / worker boot costs), with the data
+#                   snapshot cache warm
+import argparse
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import time
+
+STARTUP_MODULES = ["streamlit", "pandas", "numpy", "engine", "engine.core"]
+LAZY_MODULES = ["altair", "sklearn"]  # the app never imports these itself (charts are plain vega-lite specs)
+
+_RENDER_SNIPPET = """
+import sys
+from streamlit.testing.v1 import AppTest
+at = AppTest.from_file(sys.argv[1], default_timeout=120).run()
+if at.exception:
+    raise SystemExit(str(at.exception[0].value))
+print(",".join(m for m in sys.argv[2:] if m in sys.modules))
+"""
+
+
+def import_times(module, runs=3, top=10):
+    """Median cumulative import time (ms) of module in a fresh interpreter + its slowest imports."""
+    totals, slowest = [], {}
+    for _ in range(runs):
+        proc = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                              capture_output=True, text=True)
+        if proc.returncode != 0:
+            return {"error": proc.stderr.strip().splitlines()[-1]}
+        cumulative = {}
+        for line in proc.stderr.splitlines():
+            if not line.startswith("import time:") or "|" not in line:
+                continue
+            parts = [p.strip() for p in line[len("import time:"):].split("|")]
+            if not parts[0].isdigit():
+                continue  # header row
+            cumulative[parts[2].strip()] = int(parts[1]) / 1000
+        totals.append(cumulative.get(module, 0.0))
+        for name, ms in cumulative.items():
+            slowest.setdefault(name, []).append(ms)
+    slowest = sorted(((statistics.median(v), k) for k, v in slowest.items() if k != module), reverse=True)
+    return {"ms": round(statistics.median(totals), 1),
+            "slowest": [{"module": k, "ms": round(ms, 1)} for ms, k in slowest[:top]]}
+
+
+def first_render(script="app.py", runs=3):
+    """Median wall time (ms) from interpreter launch to the first completed script run."""
+    cmd = [sys.executable, "-c", _RENDER_SNIPPET, script] + LAZY_MODULES
+    warm = subprocess.run(cmd, capture_output=True, text=True)  # fills the snapshot cache
+    if warm.returncode != 0:
+        return {"error": (warm.stderr or warm.stdout).strip().splitlines()[-1]}
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        proc = subprocess.run(cmd, capture_output=True, text=True)
+        times.append((time.perf_counter() - start) * 1000)
+    loaded = [m for m in proc.stdout.strip().split(",") if m]
+    return {"ms": round(statistics.median(times), 1), "max_ms": round(max(times), 1),
+            "lazy_modules_loaded": loaded}
+
+
+def measure(script="app.py", runs=3):
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "runs": runs,
+        "imports": {m: import_times(m, runs) for m in STARTUP_MODULES + LAZY_MODULES},
+        "first_render": first_render(script, runs),
+    }
+
+
+def format_report(result):
+    lines = [f"python {result['python']} ({result['platform']}), median of {result['runs']} runs"]
+    for module, r in result["imports"].items():
+        lines.append(f"  import {module:<14} " + (r["error"] if "error" in r else f"{r['ms']:8.1f} ms"))
+    r = result["first_render"]
+    if "error" in r:
+        lines.append(f"  first render         {r['error']}")
+    else:
+        lines.append(f"  first render         {r['ms']:8.1f} ms (max {r['max_ms']:.1f} ms)")
+        if r["lazy_modules_loaded"]:
+            lines.append(f"  loaded eagerly: {', '.join(r['lazy_modules_loaded'])}")
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="measure app import and first-render time")
+    parser.add_argument("--script", default="app.py")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args()
+    result = measure(args.script, args.runs)
+    print(format_report(result))
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(result, f, indent=2)
@@ -0,0 +1,258 @@
+# schema-faithful synthetic datasets for scale testing
+#
+#   python -m engine.synth --rows 1000000 --out-dir synth_data
+#   python -m engine.synth --rows 10000000 --out-dir synth_data --affordability affordability_raw.csv
+#   python -m engine.synth --save-model synth_model.json   # learn only, generate later with --model
+#
+# learn() fits a model of the shipped data:
+#   - every numeric column's marginal distribution (quantiles, or exact value frequencies for
+#     columns with few distinct values such as the 0/1 MSI flags), and whether it holds whole numbers
+#   - how the columns move together: Spearman rank correlations turned into a Gaussian copula
+#   - null rates per group of columns that are missing together (e.g. all the bachelor degree
+#     percentages are missing for the same institutions)
+#   - state and sector frequencies
+# only college_selected_raw.csv ships with the repo. columns only the affordability table has
+# are learned from an affordability CSV when one is given, otherwise they come from the rough
+# PRIORS below (independent of everything else).
+#
+# generate() streams both tables chunk by chunk (numpy only, no per-row Python), so memory
+# is bounded by the chunk size and not by the row count. a row is one institution: both
+# tables get the same Unit IDs and the same values in the columns they share, the exact
+# column names app.py and the engine read, and MSI Status = any of the per-type MSI flags.
+import argparse
+import json
+import os
+import time
+from statistics import NormalDist
+
+import numpy as np
+import pandas as pd
+
+from .core import AFFORDABILITY_CSV, COLLEGE_CSV
+from .ingest import AFFORDABILITY_COLUMNS
+from .institution_table import ID_COL, AFF_ID_COL, STATE_COL
+from .metrics import MSI_Type, NAME_COL, degree_years
+
+CHUNKSIZE = 50_000
+QUANTILES = 201        # quantile knots per continuous column
+MAX_DISCRETE = 20      # columns with at most this many distinct values are sampled exactly
+ID_START = 1_000_000
+SECTOR_COL = "Sector Name"
+
+# stand-ins for the affordability-only columns when no affordability CSV is available:
+# (null rate, quantiles at 0, 10, 25, 50, 75, 90, 100 %), rough shapes of the public data
+_GRAD_RATE = (0.2, [0.0, 0.2, 0.35, 0.5, 0.65, 0.8, 1.0])
+PRIORS = {
+    "Average Work Study Award": (0.3, [0, 800, 1200, 1700, 2300, 3000, 8000]),
+    "Affordability Gap (net price minus income earned working 10 hrs at min wage)":
+        (0.05, [-10000, 2000, 6000, 11000, 17000, 23000, 45000]),
+    "Weekly Hours to Close Gap": (0.05, [0, 4, 12, 21, 33, 44, 90]),
+    "Income Earned from Working 10 Hours a Week at State's Minimum Wage":
+        (0.0, [3770, 3770, 4200, 5300, 6000, 6800, 7500]),
+    **{col: _GRAD_RATE for col in degree_years},
+}
+PRIOR_FLAG_RATES = {
+    "Historically Black College or University (HBCU)": 0.02,
+    "Asian American or Native American Pacific Islander-Serving Institution (AANAPISI)": 0.04,
+    "Alaska-Native, Native Hawaiian-Serving Institution (ANNHSI)": 0.005,
+    "Hispanic-serving Institution (HSI)": 0.09,
+    "Native American Non-Tribal Institution (NANTI)": 0.005,
+    "Predominantly Black Institution (PBI)": 0.02,
+    "Tribal College or University (TCU)": 0.005,
+}
+PRIOR_STATES = {
+    "CA": 420, "NY": 300, "PA": 260, "TX": 250, "FL": 200, "OH": 190, "IL": 170, "NC": 140, "MA": 120,
+    "GA": 120, "MI": 110, "VA": 110, "MO": 100, "TN": 100, "NJ": 90, "IN": 90, "MN": 90, "WI": 80,
+    "WA": 80, "CO": 70, "AZ": 70, "LA": 70, "AL": 70, "SC": 70, "KY": 70, "IA": 60, "OK": 60, "MD": 60,
+    "OR": 60, "PR": 60, "KS": 50, "CT": 50, "AR": 50, "MS": 40, "NE": 40, "UT": 40, "WV": 40, "ME": 30,
+    "NM": 30, "NH": 25, "MT": 25, "ID": 20, "SD": 20, "ND": 20, "VT": 20, "RI": 15, "HI": 15, "NV": 15,
+    "DC": 15, "DE": 10, "WY": 10, "AK": 8,
+}
+PRIOR_SECTORS = {"Public, 4-year or above": 0.3, "Private nonprofit, 4-year or above": 0.45,
+                 "Private for-profit, 4-year or above": 0.25}
+
+
+def _frequencies(s):
+    counts = s.dropna().astype(str).value_counts(normalize=True)
+    return {k: float(v) for k, v in counts.items()}
+
+
+def _marginal(values):
+    """Non-null values of one column -> its marginal (discrete frequencies or quantile knots)."""
+    uniq, counts = np.unique(values, return_counts=True)
+    whole = bool(np.all(values == np.round(values)))
+    if len(uniq) <= MAX_DISCRETE:
+        return {"kind": "discrete", "values": uniq.tolist(), "probs": (counts / counts.sum()).tolist(), "whole": whole}
+    return {"kind": "quantiles", "values": np.quantile(values, np.linspace(0, 1, QUANTILES)).tolist(),
+            "whole": whole}
+
+
+def _nearest_correlation(corr):
+    """Clip a (pairwise, so possibly indefinite) correlation matrix to the nearest usable one."""
+    vals, vecs = np.linalg.eigh(corr)
+    fixed = (vecs * np.clip(vals, 1e-6, None)) @ vecs.T
+    d = np.sqrt(np.diag(fixed))
+    return fixed / np.outer(d, d)
+
+
+def learn(college_df, affordability_df=None):
+    """Fit a generation model (plain JSON-able dict) to the shipped frames."""
+    college_df = college_df.rename(columns={ID_COL: AFF_ID_COL})
+    joint = college_df
+    if affordability_df is not None:
+        extra = [c for c in affordability_df.columns if c not in college_df.columns or c == AFF_ID_COL]
+        joint = college_df.merge(affordability_df[extra], on=AFF_ID_COL, how="outer")
+    text = {NAME_COL, STATE_COL, SECTOR_COL}
+    numeric = [c for c in joint.columns if c != AFF_ID_COL and c not in text and c != "MSI Status"
+               and pd.api.types.is_numeric_dtype(joint[c])]
+    data = joint[numeric].astype(float)
+
+    marginals = {c: _marginal(data[c].dropna().to_numpy()) for c in numeric if data[c].notna().any()}
+    numeric = list(marginals)
+    # Spearman rho -> Pearson correlation of the underlying normals
+    rho = data[numeric].corr(method="spearman", min_periods=30).fillna(0).to_numpy()
+    corr = _nearest_correlation(2 * np.sin(np.pi * rho / 6))
+
+    # columns with identical null masks go missing together
+    groups = {}
+    for c in numeric:
+        mask = data[c].isna().to_numpy()
+        if mask.any():
+            groups.setdefault(np.packbits(mask).tobytes(), [float(mask.mean()), []])[1].append(c)
+
+    categories = {STATE_COL: PRIOR_STATES, SECTOR_COL: PRIOR_SECTORS}
+    for col in categories:
+        if col in joint.columns and joint[col].notna().any():
+            categories[col] = _frequencies(joint[col])
+    if affordability_df is not None:
+        affordability_columns = list(affordability_df.columns)
+    else:
+        affordability_columns = AFFORDABILITY_COLUMNS
+    return {"columns": numeric, "marginals": marginals, "correlation": corr.tolist(),
+            "null_groups": [{"rate": rate, "columns": cols} for rate, cols in groups.values()],
+            "categories": {k: {str(v): float(p) for v, p in d.items()} for k, d in categories.items()},
+            "college_columns": [ID_COL if c == AFF_ID_COL else c for c in college_df.columns],
+            "affordability_columns": affordability_columns, "rows": len(joint)}
+
+
+def learn_files(college_path=COLLEGE_CSV, affordability_path=None):
+    aff = pd.read_csv(affordability_path) if affordability_path and os.path.exists(affordability_path) else None
+    return learn(pd.read_csv(college_path), aff)
+
+
+class Generator:
+    """Vectorized sampler over a learn() model; chunks(n) yields (affordability, college) frames."""
+
+    def __init__(self, model, seed=0):
+        self.model = model
+        self.rng = np.random.default_rng(seed)
+        self.columns = model["columns"]
+        self.chol = np.linalg.cholesky(np.asarray(model["correlation"], dtype=float))
+        inv = np.vectorize(NormalDist().inv_cdf)
+        self.samplers = []
+        for c in self.columns:
+            m = model["marginals"][c]
+            values = np.asarray(m["values"], dtype=float)
+            if m["kind"] == "discrete":
+                # z below thresholds[i] -> values[i]
+                cum = np.clip(np.cumsum(m["probs"])[:-1], 1e-12, 1 - 1e-12)
+                self.samplers.append(("discrete", inv(cum) if len(cum) else np.array([]), values, m["whole"]))
+            else:
+                probs = np.clip(np.linspace(0, 1, len(values)), 1e-4, 1 - 1e-4)
+                self.samplers.append(("quantiles", inv(probs), values, m["whole"]))
+        known = set(self.columns)
+        self.priors = {c: v for c, v in PRIORS.items() if c not in known}
+        self.prior_flags = {c: r for c, r in PRIOR_FLAG_RATES.items() if c not in known}
+        self.categories = {k: (np.array(list(d)), np.array(list(d.values())) / sum(d.values()))
+                           for k, d in model["categories"].items()}
+
+    def sample(self, n, id_start):
+        """n joint rows (one per institution) as {column: array}."""
+        rng = self.rng
+        z = rng.standard_normal((n, len(self.columns))) @ self.chol.T
+        out = {AFF_ID_COL: np.arange(id_start, id_start + n, dtype=np.int64)}
+        for j, (c, (kind, knots, values, whole)) in enumerate(zip(self.columns, self.samplers)):
+            if kind == "discrete":
+                col = values[np.searchsorted(knots, z[:, j])]
+            else:
+                col = np.interp(z[:, j], knots, values)
+                if whole:
+                    col = np.round(col)
+            out[c] = col
+        for c, (null_rate, q) in self.priors.items():
+            u = rng.random(n)
+            out[c] = np.where(rng.random(n) < null_rate, np.nan,
+                              np.interp(u, [0, .1, .25, .5, .75, .9, 1], q))
+        for c, rate in self.prior_flags.items():
+            out[c] = (rng.random(n) < rate).astype(float)
+        for group in self.model["null_groups"]:
+            missing = rng.random(n) < group["rate"]
+            for c in group["columns"]:
+                out[c] = np.where(missing, np.nan, out[c])
+        flags = [c for c in MSI_Type.values() if c in out]
+        out["MSI Status"] = np.any([out[c] == 1 for c in flags], axis=0).astype(np.int64) if flags else 0
+        for c in flags:
+            out[c] = np.nan_to_num(out[c]).astype(np.int64)
+        for c, (labels, p) in self.categories.items():
+            out[c] = labels[rng.choice(len(labels), n, p=p)]
+        out[NAME_COL] = np.char.add("Synthetic Institution ", out[AFF_ID_COL].astype(str))
+        return out
+
+    def chunks(self, rows, chunksize=CHUNKSIZE, id_start=ID_START):
+        college_cols = self.model["college_columns"]
+        aff_cols = self.model["affordability_columns"]
+        for start in range(0, rows, chunksize):
+            n = min(chunksize, rows - start)
+            joint = self.sample(n, id_start + start)
+            joint[ID_COL] = joint[AFF_ID_COL]
+            aff = pd.DataFrame({c: joint.get(c, np.full(n, np.nan)) for c in aff_cols})
+            college = pd.DataFrame({c: joint.get(c, np.full(n, np.nan)) for c in college_cols})
+            yield aff, college
+
+
+def generate(model, rows, out_dir=".", chunksize=CHUNKSIZE, seed=0, id_start=ID_START):
+    """Write rows institutions to out_dir/{affordability,college} CSVs; returns their paths."""
+    if rows < 1:
+        raise ValueError(f"rows must be at least 1, got {rows}")
+    os.makedirs(out_dir, exist_ok=True)
+    paths = [os.path.join(out_dir, AFFORDABILITY_CSV), os.path.join(out_dir, COLLEGE_CSV)]
+    tmp = [p + ".tmp" for p in paths]
+    first = True
+    for frames in Generator(model, seed).chunks(rows, chunksize, id_start):
+        for df, p in zip(frames, tmp):
+            df.to_csv(p, mode="w" if first else "a", header=first, index=False, float_format="%.6g")
+        first = False
+    for t, p in zip(tmp, paths):
+        os.replace(t, p)
+    return paths
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="generate synthetic datasets shaped like the shipped CSVs")
+    parser.add_argument("--rows", type=int, help="institutions to generate (at least 1)")
+    parser.add_argument("--out-dir", default="synth_data")
+    parser.add_argument("--college", default=COLLEGE_CSV, help="CSV to learn from")
+    parser.add_argument("--affordability", default=AFFORDABILITY_CSV,
+                        help="learn the affordability-only columns too, if the file exists")
+    parser.add_argument("--model", help="use a model saved with --save-model instead of learning")
+    parser.add_argument("--save-model", help="write the learned model here (JSON)")
+    parser.add_argument("--chunksize", type=int, default=CHUNKSIZE)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--id-start", type=int, default=ID_START)
+    args = parser.parse_args()
+    if args.rows is not None and args.rows < 1:
+        parser.error("--rows must be at least 1")
+    if args.model:
+        with open(args.model) as f:
+            model = json.load(f)
+    else:
+        model = learn_files(args.college, args.affordability)
+    if args.save_model:
+        with open(args.save_model, "w") as f:
+            json.dump(model, f)
+    if args.rows is not None:
+        start = time.perf_counter()
+        paths = generate(model, args.rows, args.out_dir, args.chunksize, args.seed, args.id_start)
+        print(f"{args.rows:,} institutions -> {', '.join(paths)} in {time.perf_counter() - start:.1f}s")
+    elif not args.save_model:
+        parser.error("give --rows and/or --save-model")
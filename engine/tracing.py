@@ -0,0 +1,143 @@
+# per-stage timing spans + latency histograms for the recommendation path
+#
+#   COLLEGE_TRACE=1 streamlit run app.py                # histograms in the sidebar diagnostics
+#   COLLEGE_TRACE_LOG=trace.jsonl streamlit run app.py  # also one JSON line per span
+#   python -m engine.server --trace                     # GET /metrics (text), /metrics?format=json
+#
+#   with tracer.span("filter") as span:
+#       ...
+#       span.rows = len(found)
+#
+# tracing is off unless one of the variables above is set (or tracer.enable() is called).
+# off, span() returns one shared no-op object, so an instrumented stage costs a method call
+# and a flag check. on, each finished span adds its duration to a fixed log-scale histogram
+# for its stage (20 buckets per decade, 1 us .. 100 s) and its row count to the stage's
+# total: memory is constant however long the process runs, and p50/p95/p99 are read off the
+# buckets (upper bucket bound, i.e. within ~12% above the true value, capped at the max).
+import bisect
+import json
+import os
+import threading
+import time
+
+BUCKETS = [10 ** (k / 20) for k in range(-120, 41)]  # upper bounds in seconds
+
+
+class _NoopSpan:
+    __slots__ = ()
+    rows = property(lambda self: None, lambda self, value: None)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NOOP = _NoopSpan()
+
+
+class Span:
+    __slots__ = ("tracer", "name", "rows", "start")
+
+    def __init__(self, tracer, name, rows):
+        self.tracer, self.name, self.rows = tracer, name, rows
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.tracer.record(self.name, time.perf_counter() - self.start, self.rows)
+        return False
+
+
+class StageHistogram:
+    def __init__(self):
+        self.buckets = [0] * (len(BUCKETS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.rows = 0
+
+    def add(self, seconds, rows):
+        self.buckets[bisect.bisect_left(BUCKETS, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+        if rows is not None:
+            self.rows += rows
+
+    def percentile(self, q):
+        target, seen = q * self.count, 0
+        for i, n in enumerate(self.buckets):
+            seen += n
+            if seen >= target and n:
+                return min(BUCKETS[i] if i < len(BUCKETS) else self.max, self.max)
+        return self.max
+
+    def summary(self):
+        ms = lambda s: round(s * 1000, 3)
+        return {"count": self.count, "p50_ms": ms(self.percentile(0.5)), "p95_ms": ms(self.percentile(0.95)),
+                "p99_ms": ms(self.percentile(0.99)), "max_ms": ms(self.max),
+                "mean_ms": ms(self.total / self.count) if self.count else 0.0,
+                "rows": self.rows, "rows_per_call": round(self.rows / self.count, 1) if self.count else 0.0}
+
+
+class Tracer:
+    def __init__(self, enabled=False, log_path=None):
+        self.enabled = enabled or bool(log_path)
+        self.log_path = log_path
+        self._log = None
+        self._lock = threading.Lock()
+        self.stages = {}
+        self.started = time.time()
+
+    def enable(self, log_path=None):
+        self.log_path = log_path or self.log_path
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+
+    def span(self, name, rows=None):
+        """Context manager timing one run of stage name; set .rows on it for the row count."""
+        if not self.enabled:
+            return _NOOP
+        return Span(self, name, rows)
+
+    def record(self, name, seconds, rows=None):
+        with self._lock:
+            hist = self.stages.get(name)
+            if hist is None:
+                hist = self.stages[name] = StageHistogram()
+            hist.add(seconds, rows)
+            if self.log_path:
+                if self._log is None:
+                    self._log = open(self.log_path, "a", buffering=1)
+                self._log.write(json.dumps({"ts": round(time.time(), 3), "stage": name,
+                                            "ms": round(seconds * 1000, 3), "rows": rows}) + "\n")
+
+    def reset(self):
+        with self._lock:
+            self.stages = {}
+            self.started = time.time()
+
+    def snapshot(self):
+        """{stage: count, p50/p95/p99/max/mean in ms, rows} for every stage seen so far."""
+        with self._lock:
+            return {name: hist.summary() for name, hist in self.stages.items()}
+
+    def format_text(self):
+        stages = self.snapshot()
+        if not stages:
+            return "tracing on, nothing recorded yet" if self.enabled else "tracing off (set COLLEGE_TRACE=1)"
+        lines = [f"{'stage':<18} {'count':>6} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'max ms':>9} {'rows/call':>10}"]
+        for name, s in stages.items():
+            lines.append(f"{name:<18} {s['count']:>6} {s['p50_ms']:>9.3f} {s['p95_ms']:>9.3f} {s['p99_ms']:>9.3f} "
+                         f"{s['max_ms']:>9.3f} {s['rows_per_call']:>10}")
+        return "\n".join(lines)
+
+
+# process-wide tracer the engine, app and server report to
+tracer = Tracer(enabled=bool(os.environ.get("COLLEGE_TRACE")), log_path=os.environ.get("COLLEGE_TRACE_LOG"))
@@ -0,0 +1,112 @@
+# engine.server over a small in-memory engine, no CSVs needed
+#
+#   python -m unittest discover tests
+import json
+import threading
+import unittest
+from urllib.error import HTTPError
+from urllib.parse import urlencode
+from urllib.request import urlopen
+
+import numpy as np
+import pandas as pd
+
+from engine.core import Engine
+from engine.institution_table import (ID_COL, IN_STATE_TUITION, OUT_STATE_TUITION, DEPENDENT_DEBT,
+                                      INDEPENDENT_DEBT, ENROLLMENT)
+from engine.server import serve
+
+
+def small_engine(n=12):
+    ids = np.arange(100000, 100000 + n)
+    affordability = pd.DataFrame({
+        "Unit ID": ids,
+        "Institution Name": [f"College {i}" for i in range(n)],
+        "MSI Status": [i % 3 == 0 for i in range(n)],
+        "Average Work Study Award": np.linspace(1000, 3000, n),
+        "Affordability Gap (net price minus income earned working 10 hrs at min wage)": np.linspace(2000, 20000, n),
+        "State Abbreviation": ["CA", "NY", "TX"] * (n // 3),
+    })
+    college = pd.DataFrame({
+        ID_COL: ids,
+        IN_STATE_TUITION: np.linspace(21000, 60000, n),
+        OUT_STATE_TUITION: np.linspace(30000, 70000, n),
+        DEPENDENT_DEBT: np.linspace(12000, 35000, n),
+        INDEPENDENT_DEBT: np.linspace(11000, 30000, n),
+        ENROLLMENT: np.linspace(2000, 20000, n),
+        "Median Earnings of Students Working and Not Enrolled 10 Years After Entry": np.linspace(40000, 80000, n),
+    })
+    return Engine(affordability, college)
+
+
+class ServerTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.server = serve(small_engine(), port=0)
+        cls.thread = threading.Thread(target=cls.server.serve_forever, daemon=True)
+        cls.thread.start()
+        host, port = cls.server.server_address[:2]
+        cls.base = f"http://{host}:{port}"
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def request(self, path, body=None):
+        data = body if body is None or isinstance(body, bytes) else json.dumps(body).encode()
+        try:
+            with urlopen(self.base + path, data=data, timeout=10) as resp:
+                return resp.status, json.loads(resp.read())
+        except HTTPError as e:
+            return e.code, json.loads(e.read())
+
+    def test_recommend(self):
+        status, body = self.request("/recommend", {"state": "CA", "in_out_pref": "In-State"})
+        self.assertEqual(status, 200)
+        self.assertTrue(body["results"])
+        self.assertEqual(body["matched"], len(body["results"]))
+
+    def test_recommend_query_string(self):
+        status, body = self.request("/recommend?" + urlencode({"state": "NY", "top_k": 2}))
+        self.assertEqual(status, 200)
+        self.assertLessEqual(len(body["results"]), 2)
+
+    def test_bad_requests(self):
+        cases = [
+            ({}, "state is required"),
+            ({"state": "ZZ"}, "unknown state"),
+            ({"state": ["CA"]}, "state must be"),
+            ({"state": 6}, "state must be"),
+            ({"state": "CA", "in_out_pref": "Anywhere"}, "in_out_pref"),
+            ({"state": "CA", "student_body_size": "Huge"}, "student_body_size"),
+            ({"state": "CA", "tuition_range": [10]}, "tuition_range"),
+            ({"state": "CA", "tuition_range": "nan,50"}, "finite"),
+            ({"state": "CA", "debt_range": [40, 10]}, "lower bound"),
+            ({"state": "CA", "tuition_importance": "high"}, "importances"),
+            ({"state": "CA", "debt_importance": -10}, "debt_importance must be between 0 and 5"),
+            ({"state": "CA", "msi_importance": 99}, "msi_importance must be between 0 and 5"),
+            ({"state": "CA", "top_k": 0}, "top_k"),
+            ([1, 2], "mapping"),
+        ]
+        for payload, message in cases:
+            with self.subTest(payload=payload):
+                status, body = self.request("/recommend", payload)
+                self.assertEqual(status, 400)
+                self.assertIn(message, body["error"])
+
+    def test_bad_state_query_string(self):
+        status, body = self.request("/recommend?state=ZZ")
+        self.assertEqual(status, 400)
+
+    def test_invalid_json(self):
+        status, body = self.request("/recommend", b"{not json")
+        self.assertEqual(status, 400)
+
+    def test_unknown_endpoint(self):
+        status, _ = self.request("/nope")
+        self.assertEqual(status, 404)
+
+
+if __name__ == "__main__":
+    unittest.main()